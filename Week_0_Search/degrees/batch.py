@@ -0,0 +1,97 @@
+import csv
+import json
+import multiprocessing
+import sys
+import time
+
+import snapshot
+from nameindex import POLICIES, disambiguate
+
+# Graph of the current process and its disambiguation policy, set by init_worker
+graph = None
+policy = None
+
+
+def main():
+    if len(sys.argv) not in (3, 4, 5):
+        sys.exit("Usage: python batch.py directory queries.csv [workers [policy]]")
+    directory = sys.argv[1]
+    queries = sys.argv[2]
+    workers = int(sys.argv[3]) if len(sys.argv) >= 4 else None
+    policy = sys.argv[4] if len(sys.argv) == 5 else "most-movies"
+    if policy not in POLICIES:
+        sys.exit(f"Policy must be one of: {', '.join(POLICIES)}")
+
+    # Load once up front, so the snapshot exists before the workers map it
+    snapshot.load(directory)
+
+    with open(queries, encoding="utf-8") as f:
+        for line in run_batch(directory, read_queries(f), workers, policy):
+            print(line, flush=True)
+
+
+def read_queries(f):
+    """
+    Yields (source, target) pairs from a CSV file
+    with source and target columns of person_ids or names.
+    """
+    reader = csv.DictReader(f)
+    for row in reader:
+        yield row["source"], row["target"]
+
+
+def run_batch(directory, queries, workers=None, policy="most-movies", chunksize=16):
+    """
+    Yields one JSON line per (source, target) query, in input order.
+    Names shared by several people are resolved by policy
+    (see nameindex.POLICIES).
+
+    Queries are answered by a pool of `workers` processes (one per core
+    by default). Each worker memory-maps the directory's snapshot, so
+    the graph is loaded once and its pages are shared between them.
+    """
+    with multiprocessing.Pool(workers, initializer=init_worker, initargs=(directory, policy)) as pool:
+        for result in pool.imap(answer, queries, chunksize):
+            yield json.dumps(result)
+
+
+def init_worker(directory, disambiguation_policy):
+    global graph, policy
+    graph = snapshot.load(directory)
+    policy = disambiguation_policy
+
+
+def answer(query):
+    """
+    Returns the result of a single (source, target) query as a dictionary.
+    """
+    source, target = query
+    result = {"source": source, "target": target}
+    start = time.perf_counter()
+    try:
+        path = graph.shortest_path(resolve(source), resolve(target), bidirectional=True)
+    except KeyError as e:
+        result["error"] = f"unknown person {e.args[0]}"
+    except ValueError as e:
+        result["error"] = str(e)
+    else:
+        result["degrees"] = None if path is None else len(path)
+        result["path"] = path
+    result["seconds"] = time.perf_counter() - start
+    return result
+
+
+def resolve(person):
+    """
+    Returns the person_id for a person_id or a name.
+    """
+    if person in graph.person_index:
+        return person
+    person_ids = graph.names[person.lower()]
+    if len(person_ids) == 1:
+        return next(iter(person_ids))
+    return disambiguate(person_ids, graph.people, policy)
+
+
+if __name__ == "__main__":
+    main()
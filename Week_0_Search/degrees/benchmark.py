@@ -0,0 +1,137 @@
+import random
+import resource
+import sys
+import tempfile
+import time
+from multiprocessing import Pool
+
+import degrees
+from generate import generate
+
+# Ways of loading the data: the dictionaries, a compact graph from the CSV
+# files (which also writes its snapshot), then the graph from that snapshot
+LOADERS = ("dict", "compact", "snapshot")
+
+
+def main():
+    if len(sys.argv) >= 2 and sys.argv[1] == "--sizes":
+        if len(sys.argv) not in (3, 4):
+            sys.exit("Usage: python benchmark.py --sizes size[,size...] [queries]")
+        sizes = [int(size) for size in sys.argv[2].split(",")]
+        queries = int(sys.argv[3]) if len(sys.argv) == 4 else 100
+        benchmark_sizes(sizes, queries)
+        return
+
+    if len(sys.argv) > 3:
+        sys.exit("Usage: python benchmark.py [directory] [queries]")
+    directory = sys.argv[1] if len(sys.argv) >= 2 else "large"
+    queries = int(sys.argv[2]) if len(sys.argv) == 3 else 100
+
+    start = time.perf_counter()
+    degrees.load_data(directory)
+    print(f"Loaded {directory} in {time.perf_counter() - start:.2f}s")
+
+    pairs = sample_pairs(queries)
+    for bidirectional in (False, True):
+        timings = benchmark(pairs, bidirectional)
+        mode = "bidirectional" if bidirectional else "breadth-first"
+        report(mode, timings)
+
+
+def benchmark_sizes(sizes, queries):
+    """
+    For each size, generate a dataset of that many people and movies
+    (see generate.py), then print the load time, memory and query
+    latencies of every way of loading it.
+    """
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as directory:
+            start = time.perf_counter()
+            rows = generate(directory, size, size)
+            print(f"Generated {size} people, {size} movies and {rows} stars "
+                  f"in {time.perf_counter() - start:.2f}s")
+
+            for loader in LOADERS:
+                # A fresh process per loader, so its peak memory is its own
+                with Pool(1) as pool:
+                    result = pool.apply(measure, (directory, loader, queries))
+                print(f"  {loader}: loaded in {result['load_seconds']:.2f}s, "
+                      f"peak memory after loading {result['memory'] / 2 ** 20:.0f}MB")
+                for mode, timings in result["timings"].items():
+                    report(f"    {mode}", timings)
+
+
+def measure(directory, loader, queries):
+    """
+    Load directory with loader (one of LOADERS) and time queries random
+    queries in both search modes. Returns a dictionary of: load_seconds,
+    memory (the process's peak resident size in bytes) and timings
+    (the seconds taken by each query, by search mode).
+    """
+    start = time.perf_counter()
+    if loader == "dict":
+        degrees.load_data(directory)
+    else:
+        degrees.load_graph(directory)
+    load_seconds = time.perf_counter() - start
+    # ru_maxrss is in kilobytes on Linux
+    memory = 1024 * resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+
+    pairs = sample_pairs(queries)
+    timings = {}
+    for bidirectional in (False, True):
+        mode = "bidirectional" if bidirectional else "breadth-first"
+        timings[mode] = benchmark(pairs, bidirectional)
+    return {"load_seconds": load_seconds, "memory": memory, "timings": timings}
+
+
+def sample_pairs(queries):
+    """
+    Returns queries random (source, target) pairs of distinct people.
+    """
+    # Same seed every run so timings stay comparable between revisions
+    rng = random.Random(50)
+    person_ids = sorted(degrees.people)
+    pairs = []
+    while len(pairs) < queries:
+        source, target = rng.sample(person_ids, 2)
+        pairs.append((source, target))
+    return pairs
+
+
+def benchmark(pairs, bidirectional):
+    """
+    Returns the time in seconds taken by each (source, target) query.
+    """
+    timings = []
+    for source, target in pairs:
+        start = time.perf_counter()
+        degrees.shortest_path(source, target, bidirectional=bidirectional)
+        timings.append(time.perf_counter() - start)
+    return timings
+
+
+def report(mode, timings):
+    """
+    Prints total, mean, median, 90th and 99th percentile and worst query times.
+    """
+    total = sum(timings)
+    print(f"{mode}: {len(timings)} queries in {total:.2f}s, "
+          f"mean {1000 * total / len(timings):.2f}ms, "
+          f"p50 {1000 * percentile(timings, 50):.2f}ms, "
+          f"p90 {1000 * percentile(timings, 90):.2f}ms, "
+          f"p99 {1000 * percentile(timings, 99):.2f}ms, "
+          f"max {1000 * max(timings):.2f}ms")
+
+
+def percentile(timings, percent):
+    """
+    Returns the smallest timing at least percent percent of timings are no greater than.
+    """
+    ordered = sorted(timings)
+    rank = max(1, -(-len(ordered) * percent // 100))
+    return ordered[rank - 1]
+
+
+if __name__ == "__main__":
+    main()
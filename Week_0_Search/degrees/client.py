@@ -0,0 +1,99 @@
+import json
+import sys
+from urllib.error import HTTPError
+from urllib.parse import urlencode
+from urllib.request import urlopen
+
+
+class Client():
+    """
+    Client for a degrees server (see server.py).
+    """
+
+    def __init__(self, port=8050, host="127.0.0.1"):
+        self.url = f"http://{host}:{port}"
+
+    def get(self, endpoint, **query):
+        try:
+            with urlopen(f"{self.url}/{endpoint}?{urlencode(query)}") as response:
+                return json.load(response)
+        except HTTPError as e:
+            raise LookupError(json.load(e)["error"]) from None
+
+    def shortest_path(self, source, target, bidirectional=False):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target, or None if not connected.
+        """
+        path = self.query_path(source, target, bidirectional)["path"]
+        return None if path is None else [tuple(step) for step in path]
+
+    def query_path(self, source, target, bidirectional=False):
+        """
+        Returns the server's full answer for a shortest path query:
+        a dictionary of source, target, degrees, path, names (of the
+        people on the path), titles (of the movies on it) and seconds.
+        """
+        query = {"source": source, "target": target}
+        if bidirectional:
+            query["bidirectional"] = "1"
+        return self.get("path", **query)
+
+    def people(self, name, match="exact", limit=10):
+        """
+        Returns a list of dictionaries of: id, name, birth
+        for the people with the given name, or with names starting
+        with it (match="prefix") or spelled like it (match="fuzzy").
+        """
+        return self.get("people", name=name, match=match, limit=limit)
+
+
+def person_id_for_name(client, name):
+    """
+    Returns the IMDB id for a person's name,
+    resolving ambiguities as needed.
+    """
+    people = client.people(name)
+    if len(people) == 0:
+        return None
+    elif len(people) > 1:
+        print(f"Which '{name}'?")
+        for person in people:
+            print(f"ID: {person['id']}, Name: {person['name']}, Birth: {person['birth']}")
+        person_id = input("Intended Person ID: ")
+        if person_id in [person["id"] for person in people]:
+            return person_id
+        return None
+    else:
+        return people[0]["id"]
+
+
+def main():
+    if len(sys.argv) > 2:
+        sys.exit("Usage: python client.py [port]")
+    client = Client(int(sys.argv[1])) if len(sys.argv) == 2 else Client()
+
+    source = person_id_for_name(client, input("Name: "))
+    if source is None:
+        sys.exit("Person not found.")
+    target = person_id_for_name(client, input("Name: "))
+    if target is None:
+        sys.exit("Person not found.")
+
+    answer = client.query_path(source, target)
+    path = answer["path"]
+    if path is None:
+        print("Not connected.")
+    else:
+        degrees = len(path)
+        print(f"{degrees} degrees of separation.")
+        path = [(None, source)] + path
+        for i in range(degrees):
+            person1 = answer["names"][path[i][1]]
+            person2 = answer["names"][path[i + 1][1]]
+            movie = answer["titles"][path[i + 1][0]]
+            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+
+
+if __name__ == "__main__":
+    main()
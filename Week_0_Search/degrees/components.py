@@ -0,0 +1,133 @@
+import os
+import struct
+from array import array
+
+import snapshot
+
+MAGIC = b"COMPONEN"
+VERSION = 1
+
+# Magic, version, padding, number of people, then the CSV signature
+HEADER = struct.Struct("<8sI4xq6q")
+
+
+def components_path(directory):
+    return os.path.join(directory, "degrees.components")
+
+
+class Components():
+    """
+    Connected-component labels of people, indexed by person.
+
+    Components joined by stars added after labelling are merged by
+    union-find over the labels themselves, so the per-person table
+    never needs rewriting.
+    """
+
+    def __init__(self, labels):
+        self.labels = labels
+        # Merged labels point at the label they were merged into
+        self.parents = {}
+
+    def find(self, label):
+        while label in self.parents:
+            label = self.parents[label]
+        return label
+
+    def __getitem__(self, person):
+        return self.find(self.labels[person])
+
+    def union(self, person, other):
+        """
+        Merge the components of two people.
+        """
+        label = self[person]
+        other_label = self[other]
+        if label != other_label:
+            self.parents[max(label, other_label)] = min(label, other_label)
+
+
+def load(directory, graph):
+    """
+    Returns the Components of the people in graph, read from the
+    directory's component file when that is up to date, else computed
+    and saved for next time. Stars added to graph since it was loaded
+    are merged in on top.
+    """
+    csv_signature = snapshot.signature(directory)
+    try:
+        labels = read(components_path(directory), csv_signature, len(graph.person_ids))
+    except (OSError, ValueError):
+        labels = label_components(graph)
+        try:
+            write(labels, components_path(directory), csv_signature)
+        except OSError:
+            pass
+
+    components = Components(labels)
+    for person, movie in graph.added:
+        for costar in graph.stars_of(movie):
+            components.union(person, costar)
+    return components
+
+
+def label_components(graph):
+    """
+    Returns the connected-component label of every person in graph,
+    by union-find over the people of each movie.
+
+    Labels are dense integers numbered in order of each component's
+    first person.
+    """
+    size = len(graph.person_ids)
+    parents = array("i", range(size))
+    sizes = array("i", [1]) * size
+
+    def find(person):
+        while parents[person] != person:
+            # Path halving: point every other person at its grandparent
+            parents[person] = parents[parents[person]]
+            person = parents[person]
+        return person
+
+    for movie in range(len(graph.movie_ids)):
+        stars = graph.stars_of(movie)
+        if len(stars) < 2:
+            continue
+        root = find(stars[0])
+        for person in stars[1:]:
+            other = find(person)
+            if other == root:
+                continue
+            # Union by size keeps the trees shallow
+            if sizes[other] > sizes[root]:
+                root, other = other, root
+            parents[other] = root
+            sizes[root] += sizes[other]
+
+    labels = array("i", [-1]) * size
+    numbers = {}
+    for person in range(size):
+        labels[person] = numbers.setdefault(find(person), len(numbers))
+    return labels
+
+
+def write(labels, path, csv_signature):
+    """
+    Write component labels to path, tagged with csv_signature.
+    """
+    with snapshot.atomic_write(path) as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(labels), *csv_signature))
+        f.write(labels)
+
+
+def read(path, csv_signature, size):
+    """
+    Returns the component labels memory-mapped from path. Raises
+    ValueError as snapshot.map_file does, or if the labels are not
+    for size people.
+    """
+    view, (count,) = snapshot.map_file(path, HEADER, MAGIC, VERSION, csv_signature, "component file")
+    if count != size:
+        raise ValueError("component file is out of date")
+    return snapshot.section(view, HEADER.size, 4 * count, "component file").cast("i")
@@ -1,7 +1,14 @@
 import csv
 import sys
+from collections import deque
 
-from util import Node, StackFrontier, QueueFrontier
+import components
+import delta
+import landmarks as alt
+import paths
+import snapshot
+from nameindex import disambiguate
+from util import NeighborCache, SearchStats
 
 # Maps names to a set of corresponding person_ids
 names = {}
@@ -12,6 +19,18 @@ people = {}
 # Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids)
 movies = {}
 
+# Compact integer-indexed graph, set instead of the dictionaries above by load_graph
+graph = None
+
+# Directory the graph was loaded from, where load_delta logs its rows
+graph_directory = None
+
+# Landmark distance tables for the graph, if precomputed with landmarks.py
+landmarks = None
+
+# Cache of deduplicated co-star lists, set by enable_neighbor_cache
+neighbor_cache = None
+
 
 def load_data(directory):
     """
@@ -52,14 +71,78 @@ def load_data(directory):
                 pass
 
 
+def load_graph(directory):
+    """
+    Load data into a compact Graph, from the directory's snapshot
+    when it is up to date with the CSV files, else from the CSV files.
+
+    names, people and movies become read-only views of the graph, and
+    neighbors_for_person and shortest_path run directly on it.
+    names is then a nameindex.NameIndex, which also does prefix and fuzzy lookups.
+    People in different connected components are answered without a search.
+    If landmarks.py has precomputed landmarks for the directory,
+    non-bidirectional shortest_path runs an A* search guided by them.
+    """
+    global graph, graph_directory, names, people, movies, landmarks, neighbor_cache
+    graph = snapshot.load(directory)
+    graph_directory = directory
+    # Searches on the graph do not go through the cache, see enable_neighbor_cache
+    neighbor_cache = None
+    graph.components = components.load(directory, graph)
+    names = graph.names
+    people = graph.people
+    movies = graph.movies
+    landmarks = alt.load(directory, graph)
+
+
+def load_delta(filename, directory=None):
+    """
+    Add the rows of a stars CSV file, such as a daily delta, to the loaded data.
+
+    With a compact graph, the rows are also logged next to its snapshot
+    in directory (by default the one load_graph loaded), and its
+    components and landmarks are updated, so the cost depends on the
+    size of the delta rather than of the data.
+    """
+    if graph is not None:
+        if directory is None:
+            directory = graph_directory
+        added, skipped = delta.apply(directory, graph, filename, landmarks)
+        added = [(graph.person_ids[person], graph.movie_ids[movie]) for person, movie in added]
+    else:
+        added = []
+        with open(filename, encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                person_id, movie_id = row["person_id"], row["movie_id"]
+                if person_id not in people or movie_id not in movies:
+                    continue
+                if movie_id not in people[person_id]["movies"]:
+                    people[person_id]["movies"].add(movie_id)
+                    movies[movie_id]["stars"].add(person_id)
+                    added.append((person_id, movie_id))
+
+    # Everyone in a movie that gained a star has a new co-star
+    if neighbor_cache is not None:
+        for person_id, movie_id in added:
+            for costar_id in movies[movie_id]["stars"]:
+                neighbor_cache.discard(costar_id)
+
+
 def main():
-    if len(sys.argv) > 2:
-        sys.exit("Usage: python degrees.py [directory]")
-    directory = sys.argv[1] if len(sys.argv) == 2 else "large"
+    flags = {"--all", "--bidirectional", "--compact", "--memory", "--stats"}
+    args = [arg for arg in sys.argv[1:] if arg not in flags]
+    if len(args) > 1:
+        sys.exit("Usage: python degrees.py [directory] [--all] [--bidirectional] [--compact] [--stats] [--memory]")
+    directory = args[0] if len(args) == 1 else "large"
+    bidirectional = "--bidirectional" in sys.argv[1:]
 
     # Load data from files into memory
     print("Loading data...")
-    load_data(directory)
+    if "--compact" in sys.argv[1:]:
+        load_graph(directory)
+    else:
+        load_data(directory)
     print("Data loaded.")
 
     source = person_id_for_name(input("Name: "))
@@ -69,116 +152,227 @@ def main():
     if target is None:
         sys.exit("Person not found.")
     
-    path = shortest_path(source, target)
+    if "--all" in sys.argv[1:]:
+        # Every shortest connection, printed as it is found
+        found = 0
+        for path in all_shortest_paths(source, target):
+            found += 1
+            print(f"Path {found}:")
+            print_path(source, path)
+        if found == 0:
+            print("Not connected.")
+        return
+
+    # --memory also traces the search's peak memory, which slows it down
+    trace_memory = "--memory" in sys.argv[1:]
+    if "--stats" in sys.argv[1:] or trace_memory:
+        path, stats = shortest_path(source, target, bidirectional=bidirectional, stats=True, trace_memory=trace_memory)
+        print(f"Stats: {stats.to_json()}")
+    else:
+        path = shortest_path(source, target, bidirectional=bidirectional)
     # print("path value:", path)
 
     if path is None:
         print("Not connected.")
     else:
-        degrees = len(path)
-        print(f"{degrees} degrees of separation.")
-        path = [(None, source)] + path
-        for i in range(degrees):
-            person1 = people[path[i][1]]["name"]
-            person2 = people[path[i + 1][1]]["name"]
-            movie = movies[path[i + 1][0]]["title"]
-            print(f"{i + 1}: {person1} and {person2} starred in {movie}")
+        print_path(source, path)
+
+
+def print_path(source, path):
+    """
+    Print a (movie_id, person_id) path from source, one movie per line.
+    """
+    degrees = len(path)
+    print(f"{degrees} degrees of separation.")
+    path = [(None, source)] + path
+    for i in range(degrees):
+        person1 = people[path[i][1]]["name"]
+        person2 = people[path[i + 1][1]]["name"]
+        movie = movies[path[i + 1][0]]["title"]
+        print(f"{i + 1}: {person1} and {person2} starred in {movie}")
 
 
-def shortest_path(source, target):
+def shortest_path(source, target, bidirectional=False, stats=False, trace_memory=False):
     """
     Returns the shortest list of (movie_id, person_id) pairs
     that connect the source to the target.
 
     If no possible path, returns None.
+
+    If bidirectional is True, the search grows from both ends
+    (see bidirectional_shortest_path).
+
+    If stats is True, returns (path, stats) instead, where stats is
+    a util.SearchStats of the search, with its peak memory traced
+    if trace_memory is True.
+    """
+    if not stats:
+        return find_path(source, target, bidirectional)
+    with SearchStats(trace_memory) as search_stats:
+        path = find_path(source, target, bidirectional, search_stats)
+    return path, search_stats
+
+
+def find_path(source, target, bidirectional=False, stats=None):
     """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, or None if not connected,
+    recording the search in stats if given.
+    """
+    if graph is not None:
+        return graph.shortest_path(source, target, bidirectional=bidirectional, landmarks=landmarks, stats=stats)
+    if bidirectional:
+        return bidirectional_shortest_path(source, target, stats)
     
     # BREADTH FIRST SEARCH: EXHAUTIVE SEARCH + NEAREST NODE FIRST -> GUARANTEE TO FIND OPTIMAL CORECT SOLUTION 
     
-    # Create path list
-    shortest_path_list = []
-    
-    # # Traversed state list
-    visited_state_list = []
-    
-    # Create a queue for nodes to be search
-    queue_frontier = QueueFrontier()
+    if source == target:
+        raise ValueError("Source and target actors are one person!")
     
-    # Start with source node 
-    source_node = Node(state=source, parent=None, action=None)
+    # Map each visited person to the (movie_id, person_id) edge it was reached by;
+    # this doubles as the visited set, so no Node objects are needed
+    parents = {source: None}
     
-    # If source node is not destination node, add to the queue 
-    if source_node.state == target:
-        raise ValueError("Source and target actors are one person!")
-    else:
-        queue_frontier.add(source_node)
-        visited_state_list.append(source_node.state)
+    # Queue of people to be searched, nearest first
+    queue = deque([source])
+    neighbors = iter_neighbors_for_person if stats is None else stats.timed(iter_neighbors_for_person)
     
     # While queue is not empty
-    while (not queue_frontier.empty()):
-        # Move the current node out of the queue 
-        current_node = queue_frontier.remove()
-        
-        # Compute the edge go out of this node       
-        # Get the list of nodes at the end of those edge
-        neighbors = neighbors_for_person(current_node.state)
+    while queue:
+        if stats is not None:
+            stats.frontier(len(queue))
+        # Move the current person out of the queue 
+        current_id = queue.popleft()
         
-        # For each next edge and resulting state
-        for item in neighbors:
-            neighbor_edge_id = item[0]
-            neighbor_node_id = item[1]
-            # print(next_edge_id, next_node_id)
-            
-            if queue_frontier.contains_state(neighbor_node_id) or (neighbor_node_id == current_node.state) or (neighbor_node_id in visited_state_list): # Dont revisit the nodes already in the frontier, the parent node, or the already visited ones
+        # Get the people at the end of each edge, lazily so the search can stop at the target
+        for movie_id, neighbor_id in neighbors(current_id):
+            # Dont revisit the people already visited or in the queue
+            if neighbor_id in parents:
                 continue
-            elif neighbor_node_id != target:  # If a new node is not the destination node,
-                # Create a node 
-                new_node = Node(state=neighbor_node_id, parent=current_node, action=neighbor_edge_id)
-                # Add that node to the frontier queue
-                queue_frontier.add(new_node)
-                visited_state_list.append(new_node.state)
-            else: #neighbor_node_id == target: # If a new nodes is the destination node,
-                # Create that node
-                target_node = Node(state= neighbor_node_id, parent=current_node, action=neighbor_edge_id)
-                
-                # Add that node to the frontiers and record in visited node
-                queue_frontier.add(target_node)
-                visited_state_list.append(target_node.state)
-                
-                # Backtracking the path
-                backtrack_node = target_node
-                while backtrack_node.parent != None: # when the parent node still exists
-                    # print backtrack_node
-                    # print(backtrack_node.state, backtrack_node.parent, backtrack_node.action)
-                    
-                    # Record the back track node to return path                    
-                    path_item = (backtrack_node.action, backtrack_node.state)
-                    # shortest_path_list.append(path_item)
-                    shortest_path_list.insert(0, path_item)
-                    
-                    # Traverse to parent node
-                    backtrack_node = backtrack_node.parent
-                    
-                # print("This line work")
-                # print("shortest_path_list:", shortest_path_list)
-                return shortest_path_list #Need to reverse due to the backtracking nature
+            parents[neighbor_id] = (movie_id, current_id)
             
-    # print("This line dont")
-    # If the algorithm can not find the target node (the path list is null or empty)
-    # Return null
-    assert len(shortest_path_list) == 0
+            # If a new person is the destination, backtrack the path in one pass
+            if neighbor_id == target:
+                return trace_path(parents, target)
+            queue.append(neighbor_id)
+    
+    # If the algorithm can not find the target person, return null
     return None
-    # print("shortest_path completed")
 
 
-def person_id_for_name(name):
+def trace_path(parents, person_id):
+    """
+    Returns the (movie_id, person_id) path from the root of parents to person_id,
+    where parents maps each person to the (movie_id, person_id) edge it was reached by.
+    """
+    path = []
+    while parents[person_id] is not None:
+        movie_id, parent_id = parents[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent_id
+    # Appending while walking back then reversing once avoids list.insert(0, ...)
+    path.reverse()
+    return path
+
+
+def all_shortest_paths(source, target):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, one at a time
+    (see paths.all_shortest_paths).
+    """
+    return paths.all_shortest_paths(source, target, neighbors_for_person)
+
+
+def k_shortest_paths(source, target, k):
+    """
+    Returns up to k of the shortest lists of (movie_id, person_id) pairs
+    that connect the source to the target without visiting anyone twice,
+    shortest first (see paths.shortest_simple_paths).
+    """
+    return paths.k_shortest_paths(source, target, k, neighbors_for_person)
+
+
+def bidirectional_shortest_path(source, target, stats=None):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, searching breadth first
+    from both people at once and joining the two searches where they meet.
+
+    If no possible path, returns None. Given a util.SearchStats,
+    the search records its stats there.
+    """
+    if source == target:
+        raise ValueError("Source and target actors are one person!")
+
+    # Map each reached person to the (movie_id, person_id) edge it was reached by:
+    # towards the source for the forward search, towards the target for the backward one
+    forward_parents = {source: None}
+    backward_parents = {target: None}
+    forward_layer = [source]
+    backward_layer = [target]
+    neighbors = iter_neighbors_for_person if stats is None else stats.timed(iter_neighbors_for_person)
+
+    while forward_layer and backward_layer:
+        if stats is not None:
+            stats.frontier(len(forward_layer) + len(backward_layer))
+        # Always grow the smaller layer, that is where the savings come from
+        forward = len(forward_layer) <= len(backward_layer)
+        if forward:
+            layer, parents, other_parents = forward_layer, forward_parents, backward_parents
+        else:
+            layer, parents, other_parents = backward_layer, backward_parents, forward_parents
+
+        next_layer = []
+        for person_id in layer:
+            for movie_id, neighbor_id in neighbors(person_id):
+                if neighbor_id in parents:
+                    continue
+                parents[neighbor_id] = (movie_id, person_id)
+
+                # Both searches reached this person: every layer so far was fully
+                # expanded without a meeting, so this is a shortest connection
+                if neighbor_id in other_parents:
+                    return join_paths(forward_parents, backward_parents, neighbor_id)
+                next_layer.append(neighbor_id)
+
+        if forward:
+            forward_layer = next_layer
+        else:
+            backward_layer = next_layer
+
+    # One of the searches ran out of people: the two are not connected
+    return None
+
+
+def join_paths(forward_parents, backward_parents, meeting_id):
+    """
+    Returns the (movie_id, person_id) path from the source to the target
+    through the person where the forward and backward searches met.
+    """
+    path = trace_path(forward_parents, meeting_id)
+
+    person_id = meeting_id
+    while backward_parents[person_id] is not None:
+        movie_id, child_id = backward_parents[person_id]
+        path.append((movie_id, child_id))
+        person_id = child_id
+    return path
+
+
+def person_id_for_name(name, policy=None):
     """
     Returns the IMDB id for a person's name,
     resolving ambiguities as needed.
+
+    Ambiguities are resolved by asking, or without asking by a policy
+    from nameindex.POLICIES, such as "most-movies" or "earliest-birth".
     """
     person_ids = list(names.get(name.lower(), set()))
     if len(person_ids) == 0:
         return None
+    elif len(person_ids) > 1 and policy is not None:
+        return disambiguate(person_ids, people, policy)
     elif len(person_ids) > 1:
         print(f"Which '{name}'?")
         for person_id in person_ids:
@@ -202,6 +396,8 @@ def neighbors_for_person(person_id):
     Returns (movie_id, person_id) pairs for people
     who starred with a given person.
     """
+    if graph is not None:
+        return graph.neighbors_for_person(person_id)
     movie_ids = people[person_id]["movies"]
     neighbors = set()
     for movie_id in movie_ids:
@@ -210,5 +406,63 @@ def neighbors_for_person(person_id):
     return neighbors
 
 
+def iter_neighbors_for_person(person_id):
+    """
+    Yields (movie_id, person_id) pairs for people
+    who starred with a given person, one movie at a time.
+
+    Unlike neighbors_for_person, nothing is built up front, so a search
+    can stop as soon as it meets its target. Pairs may repeat a person;
+    with the neighbor cache enabled, each co-star appears exactly once.
+    """
+    if neighbor_cache is not None:
+        return iter(neighbor_cache[person_id])
+    return walk_neighbors_for_person(person_id)
+
+
+def walk_neighbors_for_person(person_id):
+    """
+    Yields (movie_id, person_id) pairs for people
+    who starred with a given person, walking the person's movies.
+    """
+    if graph is not None:
+        for movie, costar in graph.neighbors(graph.person_index[person_id]):
+            yield graph.movie_ids[movie], graph.person_ids[costar]
+    else:
+        for movie_id in people[person_id]["movies"]:
+            for costar_id in movies[movie_id]["stars"]:
+                yield movie_id, costar_id
+
+
+def costars_for_person(person_id):
+    """
+    Returns a tuple of (movie_id, person_id) pairs with one pair
+    for each person who starred with a given person.
+    """
+    costars = {}
+    for movie_id, costar_id in walk_neighbors_for_person(person_id):
+        if costar_id != person_id and costar_id not in costars:
+            costars[costar_id] = movie_id
+    return tuple((movie_id, costar_id) for costar_id, movie_id in costars.items())
+
+
+def enable_neighbor_cache(max_neighbors=10_000_000, hubs=0):
+    """
+    Serve iter_neighbors_for_person from a cache of deduplicated co-star
+    lists holding at most max_neighbors pairs, evicting the least recently
+    used people first. The hubs people with the most movies are computed
+    up front.
+
+    Does nothing once load_graph has loaded a compact graph: its searches
+    read the graph's neighbor arrays directly, and would never use the cache.
+    """
+    global neighbor_cache
+    if graph is not None:
+        return
+    neighbor_cache = NeighborCache(costars_for_person, max_neighbors)
+    for person_id in sorted(people, key=lambda person_id: len(people[person_id]["movies"]), reverse=True)[:hubs]:
+        neighbor_cache[person_id]
+
+
 if __name__ == "__main__":
     main()
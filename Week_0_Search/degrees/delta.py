@@ -0,0 +1,54 @@
+import csv
+import sys
+
+import snapshot
+
+
+def read_stars(graph, filename):
+    """
+    Returns the (person, movie) integer pairs of a stars CSV file,
+    and the number of rows naming people or movies not in graph.
+    """
+    stars = []
+    skipped = 0
+    with open(filename, encoding="utf-8") as f:
+        reader = csv.DictReader(f)
+        for row in reader:
+            try:
+                stars.append((graph.person_index[row["person_id"]], graph.movie_index[row["movie_id"]]))
+            except KeyError:
+                skipped += 1
+    return stars, skipped
+
+
+def apply(directory, graph, filename, landmarks=None):
+    """
+    Add the rows of a stars CSV file, such as a daily delta, to graph
+    (and to its components, if indexed, and landmarks, if given), and
+    log them next to the snapshot in directory so that later loads of
+    the snapshot, components and landmarks include them.
+
+    Returns the (person, movie) pairs that were new, and the number
+    of rows naming people or movies not in graph.
+    """
+    stars, skipped = read_stars(graph, filename)
+    added = graph.add_stars(stars)
+    if landmarks is not None:
+        landmarks.add_stars(graph, added)
+    snapshot.append_log(snapshot.log_path(directory), added, snapshot.signature(directory))
+    return added, skipped
+
+
+def main():
+    if len(sys.argv) != 3:
+        sys.exit("Usage: python delta.py directory stars.csv")
+    directory = sys.argv[1]
+    filename = sys.argv[2]
+
+    graph = snapshot.load(directory)
+    added, skipped = apply(directory, graph, filename)
+    print(f"Added {len(added)} stars, skipped {skipped} rows with unknown people or movies.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+import csv
+import os
+import random
+import sys
+
+FIRST_NAMES = (
+    "James", "Mary", "John", "Patricia", "Robert", "Jennifer", "Michael", "Linda",
+    "William", "Elizabeth", "David", "Barbara", "Richard", "Susan", "Joseph", "Jessica",
+    "Thomas", "Sarah", "Charles", "Karen", "Daniel", "Nancy", "Matthew", "Lisa",
+    "Anthony", "Betty", "Mark", "Margaret", "Paul", "Sandra", "Steven", "Ashley",
+)
+LAST_NAMES = (
+    "Smith", "Johnson", "Williams", "Brown", "Jones", "Garcia", "Miller", "Davis",
+    "Rodriguez", "Martinez", "Hernandez", "Lopez", "Gonzalez", "Wilson", "Anderson", "Thomas",
+    "Taylor", "Moore", "Jackson", "Martin", "Lee", "Perez", "Thompson", "White",
+    "Harris", "Sanchez", "Clark", "Ramirez", "Lewis", "Robinson", "Walker", "Young",
+)
+TITLE_WORDS = (
+    "Night", "Return", "Last", "City", "Love", "Dark", "Star", "Road", "Secret", "House",
+    "River", "Fire", "Lost", "King", "Winter", "Game", "Shadow", "Blood", "Summer", "Dream",
+)
+
+# Chance that a person's birth year is unknown, left blank as in the IMDB data
+UNKNOWN_BIRTH = 0.3
+
+
+def generate(directory, people, movies, seed=0, popularity=0.6, max_cast=10):
+    """
+    Write people.csv, movies.csv and stars.csv for a synthetic dataset
+    of the given numbers of people and movies to directory.
+
+    Casts follow power laws like the IMDB data: most movies have a few
+    stars, and the person of popularity rank r is picked with weight
+    proportional to r ** -popularity, so a few people star in many movies.
+    Rows are written as they are drawn, so memory stays constant however
+    many rows there are. Returns the number of stars rows written.
+    """
+    rng = random.Random(seed)
+    os.makedirs(directory, exist_ok=True)
+
+    with open(os.path.join(directory, "people.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "name", "birth"])
+        for person in range(people):
+            name = f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)}"
+            # Pad the names out so common ones repeat about as often as in the IMDB data
+            if rng.random() < 0.9:
+                name += f" {rng.choice(LAST_NAMES)}"
+            birth = "" if rng.random() < UNKNOWN_BIRTH else rng.randint(1900, 2010)
+            writer.writerow([person_id(person), name, birth])
+
+    with open(os.path.join(directory, "movies.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f, quoting=csv.QUOTE_NONNUMERIC)
+        writer.writerow(["id", "title", "year"])
+        for movie in range(movies):
+            title = " ".join(rng.sample(TITLE_WORDS, rng.randint(1, 3)))
+            writer.writerow([movie_id(movie), f"{title} {movie}", rng.randint(1920, 2020)])
+
+    rows = 0
+    with open(os.path.join(directory, "stars.csv"), "w", encoding="utf-8", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["person_id", "movie_id"])
+        for movie in range(movies):
+            cast = set()
+            for i in range(cast_size(rng, max_cast)):
+                cast.add(popular_person(rng, people, popularity))
+            for person in sorted(cast):
+                writer.writerow([person_id(person), movie_id(movie)])
+            rows += len(cast)
+    return rows
+
+
+def cast_size(rng, max_cast):
+    """
+    Returns a cast size of at least 2 and at most max_cast,
+    from a Pareto distribution with a long tail of large casts.
+    """
+    return min(max_cast, int(rng.paretovariate(1.2)) + 1)
+
+
+def popular_person(rng, people, popularity):
+    """
+    Returns a person drawn with weight rank ** -popularity by inverting
+    the distribution's CDF, without a table of weights per person.
+    """
+    exponent = 1 - popularity
+    rank = int((((people + 1) ** exponent - 1) * rng.random() + 1) ** (1 / exponent)) - 1
+    # Scatter the ranks over the people, so popular people are not all early ids
+    # (multiplying by a prime permutes them, for any number of people it does not divide)
+    return (rank * 2654435761) % people
+
+
+def person_id(person):
+    return person + 100
+
+
+def movie_id(movie):
+    return movie + 100000
+
+
+def main():
+    if len(sys.argv) not in (4, 5):
+        sys.exit("Usage: python generate.py directory people movies [seed]")
+    directory = sys.argv[1]
+    people = int(sys.argv[2])
+    movies = int(sys.argv[3])
+    seed = int(sys.argv[4]) if len(sys.argv) == 5 else 0
+
+    print(f"Generating {people} people and {movies} movies...")
+    rows = generate(directory, people, movies, seed)
+    print(f"Wrote {rows} stars to {directory}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,400 @@
+import csv
+import heapq
+from array import array
+from collections.abc import Mapping
+
+from nameindex import NameIndex
+
+
+class Graph():
+    """
+    Compact person-movie graph.
+
+    Person and movie IDs are interned to dense integers (their row order
+    in the CSV files), and the stars relation is stored twice in CSR form:
+    the movies of person p are person_movies[person_offsets[p]:person_offsets[p + 1]],
+    the people of movie m are movie_people[movie_offsets[m]:movie_offsets[m + 1]].
+
+    Any sequence of ints works in place of the arrays, and any mapping in
+    place of the ID and name indexes, which is how snapshot.py serves a
+    graph straight from a memory-mapped file.
+
+    Stars added after loading (see add_stars) are kept in small
+    per-person and per-movie lists next to the CSR arrays.
+    """
+
+    def __init__(self, person_ids, person_names, person_births,
+                 movie_ids, movie_titles, movie_years,
+                 person_offsets, person_movies, movie_offsets, movie_people,
+                 person_index=None, movie_index=None, names=None):
+        self.person_ids = person_ids
+        self.person_names = person_names
+        self.person_births = person_births
+        self.movie_ids = movie_ids
+        self.movie_titles = movie_titles
+        self.movie_years = movie_years
+        self.person_offsets = person_offsets
+        self.person_movies = person_movies
+        self.movie_offsets = movie_offsets
+        self.movie_people = movie_people
+
+        # Map the original string IDs back to their dense integers
+        if person_index is None:
+            person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        if movie_index is None:
+            movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        self.person_index = person_index
+        self.movie_index = movie_index
+
+        # Maps lowercased names to a set of corresponding person_ids, like degrees.names,
+        # and also answers prefix and fuzzy lookups
+        if names is None:
+            names = NameIndex.build(person_ids, person_names)
+        self.names = names
+
+        # Connected-component label of each person, if indexed (see components.py)
+        self.components = None
+
+        # Stars added since loading: the (person, movie) pairs in order,
+        # and the extra movies of each person and people of each movie
+        self.added = []
+        self.extra_movies = {}
+        self.extra_stars = {}
+
+    @classmethod
+    def from_csv(cls, directory):
+        """
+        Load a graph from the people.csv, movies.csv and stars.csv files in directory.
+        """
+        person_ids, person_names, person_births = [], [], []
+        with open(f"{directory}/people.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                person_ids.append(row["id"])
+                person_names.append(row["name"])
+                person_births.append(row["birth"])
+
+        movie_ids, movie_titles, movie_years = [], [], []
+        with open(f"{directory}/movies.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                movie_ids.append(row["id"])
+                movie_titles.append(row["title"])
+                movie_years.append(row["year"])
+
+        person_index = {person_id: i for i, person_id in enumerate(person_ids)}
+        movie_index = {movie_id: i for i, movie_id in enumerate(movie_ids)}
+        star_people = array("i")
+        star_movies = array("i")
+        with open(f"{directory}/stars.csv", encoding="utf-8") as f:
+            reader = csv.DictReader(f)
+            for row in reader:
+                try:
+                    person = person_index[row["person_id"]]
+                    movie = movie_index[row["movie_id"]]
+                except KeyError:
+                    continue
+                star_people.append(person)
+                star_movies.append(movie)
+
+        person_offsets, person_movies = build_csr(len(person_ids), star_people, star_movies)
+        movie_offsets, movie_people = build_csr(len(movie_ids), star_movies, star_people)
+        return cls(person_ids, person_names, person_births,
+                   movie_ids, movie_titles, movie_years,
+                   person_offsets, person_movies, movie_offsets, movie_people)
+
+    def movies_of(self, person):
+        """
+        Returns the movies (as integers) a person (as an integer) starred in.
+        """
+        movies = self.person_movies[self.person_offsets[person]:self.person_offsets[person + 1]]
+        extra = self.extra_movies.get(person)
+        return movies if extra is None else list(movies) + extra
+
+    def stars_of(self, movie):
+        """
+        Returns the people (as integers) who starred in a movie (as an integer).
+        """
+        stars = self.movie_people[self.movie_offsets[movie]:self.movie_offsets[movie + 1]]
+        extra = self.extra_stars.get(movie)
+        return stars if extra is None else list(stars) + extra
+
+    def add_stars(self, stars):
+        """
+        Add (person, movie) integer pairs to the graph, merging components
+        if indexed, and returns the pairs that were not already there.
+        """
+        added = []
+        for person, movie in stars:
+            if movie in self.movies_of(person):
+                continue
+            self.extra_movies.setdefault(person, []).append(movie)
+            self.extra_stars.setdefault(movie, []).append(person)
+            self.added.append((person, movie))
+            added.append((person, movie))
+
+            # The person joins the component of the movie's other stars
+            if self.components is not None:
+                for costar in self.stars_of(movie):
+                    if costar != person:
+                        self.components.union(person, costar)
+                        break
+        return added
+
+    def neighbors(self, person):
+        """
+        Yields (movie, person) integer pairs for people
+        who starred with a given person.
+        """
+        if self.added:
+            for movie in self.movies_of(person):
+                for costar in self.stars_of(movie):
+                    yield movie, costar
+            return
+
+        # Straight off the arrays while there are no added stars to merge in
+        person_offsets, person_movies = self.person_offsets, self.person_movies
+        movie_offsets, movie_people = self.movie_offsets, self.movie_people
+        for movie in person_movies[person_offsets[person]:person_offsets[person + 1]]:
+            for costar in movie_people[movie_offsets[movie]:movie_offsets[movie + 1]]:
+                yield movie, costar
+
+    def neighbors_for_person(self, person_id):
+        """
+        Returns (movie_id, person_id) pairs for people
+        who starred with a given person.
+        """
+        return {
+            (self.movie_ids[movie], self.person_ids[costar])
+            for movie, costar in self.neighbors(self.person_index[person_id])
+        }
+
+    def shortest_path(self, source_id, target_id, bidirectional=False, landmarks=None, stats=None):
+        """
+        Returns the shortest list of (movie_id, person_id) pairs
+        that connect the source to the target.
+
+        If no possible path, returns None.
+
+        Unless bidirectional, given landmarks (see landmarks.py),
+        runs an A* search guided by their lower bounds.
+        Given a util.SearchStats, the search records its stats there.
+        """
+        if source_id == target_id:
+            raise ValueError("Source and target actors are one person!")
+        source = self.person_index[source_id]
+        target = self.person_index[target_id]
+        # People in different components are never connected, no need to search
+        if self.components is not None and self.components[source] != self.components[target]:
+            return None
+        if bidirectional:
+            path = self.bidirectional_search(source, target, stats)
+        elif landmarks is not None:
+            path = self.astar_search(source, target, landmarks, stats)
+        else:
+            path = self.breadth_first_search(source, target, stats)
+        if path is None:
+            return None
+        return [(self.movie_ids[movie], self.person_ids[person]) for movie, person in path]
+
+    def breadth_first_search(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie, person) integer pairs
+        from source to target, or None if they are not connected.
+        """
+        neighbors = self.neighbors if stats is None else stats.timed(self.neighbors)
+        # Each reached person maps to the (movie, person) edge it was reached by
+        parents = {source: None}
+        layer = [source]
+        while layer:
+            if stats is not None:
+                stats.frontier(len(layer))
+            next_layer = []
+            for person in layer:
+                for movie, costar in neighbors(person):
+                    if costar in parents:
+                        continue
+                    parents[costar] = (movie, person)
+                    if costar == target:
+                        return trace(parents, target)
+                    next_layer.append(costar)
+            layer = next_layer
+        return None
+
+    def bidirectional_search(self, source, target, stats=None):
+        """
+        Returns the shortest list of (movie, person) integer pairs
+        from source to target, growing the smaller of the two search
+        layers each round, or None if they are not connected.
+        """
+        neighbors = self.neighbors if stats is None else stats.timed(self.neighbors)
+        forward_parents = {source: None}
+        backward_parents = {target: None}
+        forward_layer = [source]
+        backward_layer = [target]
+        while forward_layer and backward_layer:
+            if stats is not None:
+                stats.frontier(len(forward_layer) + len(backward_layer))
+            forward = len(forward_layer) <= len(backward_layer)
+            if forward:
+                layer, parents, other_parents = forward_layer, forward_parents, backward_parents
+            else:
+                layer, parents, other_parents = backward_layer, backward_parents, forward_parents
+
+            next_layer = []
+            for person in layer:
+                for movie, costar in neighbors(person):
+                    if costar in parents:
+                        continue
+                    parents[costar] = (movie, person)
+                    if costar in other_parents:
+                        path = trace(forward_parents, costar)
+                        while backward_parents[costar] is not None:
+                            movie, costar = backward_parents[costar]
+                            path.append((movie, costar))
+                        return path
+                    next_layer.append(costar)
+
+            if forward:
+                forward_layer = next_layer
+            else:
+                backward_layer = next_layer
+        return None
+
+    def astar_search(self, source, target, landmarks, stats=None):
+        """
+        Returns the shortest list of (movie, person) integer pairs
+        from source to target, or None if they are not connected,
+        expanding people in order of their landmark lower bound.
+        """
+        bound = landmarks.lower_bound(source, target)
+        if bound is None:
+            return None
+        neighbors = self.neighbors if stats is None else stats.timed(self.neighbors)
+
+        parents = {source: None}
+        depths = {source: 0}
+        # Entries are (estimate, -depth, person): ties on the estimate
+        # go to the deepest person, which is closest to the target
+        queue = [(bound, 0, source)]
+        expanded = set()
+        while queue:
+            if stats is not None:
+                stats.frontier(len(queue))
+            estimate, negative_depth, person = heapq.heappop(queue)
+            if person == target:
+                return trace(parents, target)
+            if person in expanded:
+                continue
+            expanded.add(person)
+
+            depth = 1 - negative_depth
+            for movie, costar in neighbors(person):
+                if depths.get(costar, depth + 1) <= depth:
+                    continue
+                bound = landmarks.lower_bound(costar, target)
+                if bound is None:
+                    continue
+                depths[costar] = depth
+                parents[costar] = (movie, person)
+                # Nothing left in the queue can reach the target in fewer degrees
+                if costar == target and depth <= estimate:
+                    return trace(parents, target)
+                heapq.heappush(queue, (depth + bound, -depth, costar))
+        return None
+
+    @property
+    def people(self):
+        """
+        Read-only view of the graph shaped like degrees.people.
+        """
+        return PeopleView(self)
+
+    @property
+    def movies(self):
+        """
+        Read-only view of the graph shaped like degrees.movies.
+        """
+        return MoviesView(self)
+
+
+class PeopleView(Mapping):
+    """
+    Maps person_ids to a dictionary of: name, birth, movies (a set of movie_ids),
+    built on demand from a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, person_id):
+        graph = self.graph
+        person = graph.person_index[person_id]
+        return {
+            "name": graph.person_names[person],
+            "birth": graph.person_births[person],
+            "movies": {graph.movie_ids[movie] for movie in graph.movies_of(person)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.person_ids)
+
+    def __len__(self):
+        return len(self.graph.person_ids)
+
+
+class MoviesView(Mapping):
+    """
+    Maps movie_ids to a dictionary of: title, year, stars (a set of person_ids),
+    built on demand from a Graph.
+    """
+
+    def __init__(self, graph):
+        self.graph = graph
+
+    def __getitem__(self, movie_id):
+        graph = self.graph
+        movie = graph.movie_index[movie_id]
+        return {
+            "title": graph.movie_titles[movie],
+            "year": graph.movie_years[movie],
+            "stars": {graph.person_ids[person] for person in graph.stars_of(movie)}
+        }
+
+    def __iter__(self):
+        return iter(self.graph.movie_ids)
+
+    def __len__(self):
+        return len(self.graph.movie_ids)
+
+
+def build_csr(size, sources, destinations):
+    """
+    Returns (offsets, indices) arrays grouping destinations by source,
+    for sources in range(size).
+    """
+    offsets = array("q", bytes(8 * (size + 1)))
+    for source in sources:
+        offsets[source + 1] += 1
+    for i in range(size):
+        offsets[i + 1] += offsets[i]
+
+    indices = array("i", bytes(4 * len(destinations)))
+    position = array("q", offsets[:-1])
+    for source, destination in zip(sources, destinations):
+        indices[position[source]] = destination
+        position[source] += 1
+    return offsets, indices
+
+
+def trace(parents, person):
+    """
+    Returns the (movie, person) path from the root of parents to person.
+    """
+    path = []
+    while parents[person] is not None:
+        movie, parent = parents[person]
+        path.append((movie, person))
+        person = parent
+    path.reverse()
+    return path
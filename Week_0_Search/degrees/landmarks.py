@@ -0,0 +1,209 @@
+import mmap
+import os
+import struct
+import sys
+from array import array
+from collections import deque
+
+import snapshot
+
+MAGIC = b"LANDMARK"
+VERSION = 2
+
+# Magic, version, number of landmarks, number of people, then the CSV signature
+HEADER = struct.Struct("<8sIIq6q")
+
+# Distance recorded for people a landmark cannot reach: more than any
+# real distance, so a table of 32-bit distances needs no cap on depth
+UNREACHABLE = 2 ** 31 - 1
+
+
+class Landmarks():
+    """
+    Breadth-first distances from a few landmark people to every person,
+    giving ALT (A*, Landmarks, Triangle inequality) lower bounds on the
+    degrees of separation between any two people.
+    """
+
+    def __init__(self, people, distances):
+        # Landmark people (as integers) and, for each one, a table of distances by person
+        self.people = people
+        self.distances = distances
+
+    @classmethod
+    def build(cls, graph, count=16):
+        """
+        Pick count landmarks from graph and compute their distance tables.
+
+        The first landmark is the person with the most movies, each next one
+        is the reachable person farthest from all landmarks chosen so far,
+        which spreads them around the edge of the graph.
+        """
+        size = len(graph.person_ids)
+        if size == 0:
+            return cls([], [])
+        landmark = max(range(size), key=lambda person: len(graph.movies_of(person)))
+
+        people = []
+        distances = []
+        nearest = array("i", [UNREACHABLE]) * size
+        while len(people) < min(count, size):
+            people.append(landmark)
+            table = distances_from(graph, landmark)
+            distances.append(table)
+            for person in range(size):
+                if table[person] < nearest[person]:
+                    nearest[person] = table[person]
+
+            # Farthest person the landmarks reach. Landmarks are at distance 0, so one is
+            # picked only when every person reached is a landmark, which ends the loop
+            farthest = max(
+                (person for person in range(size) if nearest[person] != UNREACHABLE),
+                key=nearest.__getitem__
+            )
+            if nearest[farthest] == 0:
+                break
+            landmark = farthest
+        return cls(people, distances)
+
+    def lower_bound(self, person, target):
+        """
+        Returns a lower bound on the degrees of separation between person and
+        target, or None if some landmark proves they are not connected.
+        """
+        bound = 0
+        for table in self.distances:
+            to_person = table[person]
+            to_target = table[target]
+            if to_person == UNREACHABLE or to_target == UNREACHABLE:
+                # A landmark reaching exactly one of them separates them
+                if to_person != to_target:
+                    return None
+                continue
+            difference = abs(to_target - to_person)
+            if difference > bound:
+                bound = difference
+        return bound
+
+    def add_stars(self, graph, stars):
+        """
+        Update the distance tables for (person, movie) pairs just added
+        to graph, relaxing distances outwards from the people whose
+        distance drops, so the work is proportional to what changed.
+        """
+        for table in self.distances:
+            queue = deque()
+            for person, movie in stars:
+                # The movie's cast, the new star included, are all one degree apart
+                cast = graph.stars_of(movie)
+                nearest = min(table[costar] for costar in cast)
+                if nearest == UNREACHABLE:
+                    continue
+                for costar in cast:
+                    if table[costar] > nearest + 1:
+                        table[costar] = nearest + 1
+                        queue.append(costar)
+
+            while queue:
+                person = queue.popleft()
+                distance = table[person] + 1
+                for movie in graph.movies_of(person):
+                    for costar in graph.stars_of(movie):
+                        if table[costar] > distance:
+                            table[costar] = distance
+                            queue.append(costar)
+
+    def write(self, path, csv_signature):
+        """
+        Write the landmark tables to path, tagged with csv_signature.
+        """
+        size = len(self.distances[0]) if self.distances else 0
+        with snapshot.atomic_write(path) as f:
+            f.write(HEADER.pack(MAGIC, VERSION, len(self.people), size, *csv_signature))
+            f.write(array("i", self.people))
+            for table in self.distances:
+                f.write(table)
+
+    @classmethod
+    def read(cls, path, csv_signature):
+        """
+        Returns the Landmarks memory-mapped from path, raising ValueError
+        as snapshot.map_file does. The mapping is copy-on-write: add_stars
+        changes the tables in memory only.
+        """
+        view, (count, size) = snapshot.map_file(
+            path, HEADER, MAGIC, VERSION, csv_signature, "landmark file", access=mmap.ACCESS_COPY
+        )
+        people = list(snapshot.section(view, HEADER.size, 4 * count, "landmark file").cast("i"))
+        start = HEADER.size + 4 * count
+        distances = [
+            snapshot.section(view, start + 4 * i * size, 4 * size, "landmark file").cast("i")
+            for i in range(count)
+        ]
+        return cls(people, distances)
+
+
+def landmarks_path(directory):
+    return os.path.join(directory, "degrees.landmarks")
+
+
+def load(directory, graph):
+    """
+    Returns the Landmarks persisted next to the dataset in directory,
+    or None if there are none or they are out of date. Stars added to
+    graph since it was loaded are applied on top.
+    """
+    try:
+        landmarks = Landmarks.read(landmarks_path(directory), snapshot.signature(directory))
+    except (OSError, ValueError):
+        return None
+    if graph.added:
+        landmarks.add_stars(graph, graph.added)
+    return landmarks
+
+
+def distances_from(graph, source):
+    """
+    Returns the degrees of separation from source to every person
+    (as a table indexed by person), UNREACHABLE for people not connected.
+    """
+    size = len(graph.person_ids)
+    distances = array("i", [UNREACHABLE]) * size
+    # Expand each movie once, rather than once per cast member reaching it
+    seen_movies = bytearray(len(graph.movie_ids))
+    distances[source] = 0
+    layer = [source]
+    depth = 0
+    while layer:
+        depth += 1
+        next_layer = []
+        for person in layer:
+            for movie in graph.movies_of(person):
+                if seen_movies[movie]:
+                    continue
+                seen_movies[movie] = 1
+                for costar in graph.stars_of(movie):
+                    if distances[costar] == UNREACHABLE:
+                        distances[costar] = depth
+                        next_layer.append(costar)
+        layer = next_layer
+    return distances
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python landmarks.py directory [count]")
+    directory = sys.argv[1]
+    count = int(sys.argv[2]) if len(sys.argv) == 3 else 16
+
+    csv_signature = snapshot.signature(directory)
+    print("Loading data...")
+    graph = snapshot.load(directory)
+    print(f"Computing {count} landmarks...")
+    landmarks = Landmarks.build(graph, count)
+    landmarks.write(landmarks_path(directory), csv_signature)
+    print(f"Saved {len(landmarks.people)} landmarks to {landmarks_path(directory)}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,227 @@
+import math
+import zlib
+from array import array
+from bisect import bisect_left, bisect_right
+from collections.abc import Mapping
+from difflib import SequenceMatcher
+
+# Trigrams are hashed into this many buckets of the fuzzy lookup index.
+# Trigrams sharing a bucket only add candidates, which scoring then drops
+GRAM_BUCKETS = 1 << 18
+
+# Share of a name's trigrams that a fuzzy match must also have. Each typo
+# changes at most three trigrams, so this allows about one per six letters
+SHARED_GRAMS = 0.5
+
+
+class NameIndex(Mapping):
+    """
+    Maps lowercased names to a set of corresponding person_ids, by binary
+    search over the people sorted by lowercased name.
+
+    Sorting also keeps names sharing a prefix next to each other, which
+    is what prefix lookups scan. Fuzzy lookups use an inverted index from
+    the trigrams of names to the distinct names with them, each given as
+    the position in order of its first person: gram_offsets[bucket] is
+    where the names of a trigram bucket start in gram_names.
+    """
+
+    def __init__(self, person_names, order, person_ids, gram_offsets, gram_names):
+        self.person_names = person_names
+        self.order = order
+        self.person_ids = person_ids
+        self.gram_offsets = gram_offsets
+        self.gram_names = gram_names
+
+    @classmethod
+    def build(cls, person_ids, person_names):
+        """
+        Index people by name, for parallel sequences of person_ids and names.
+        """
+        keys = [name.lower() for name in person_names]
+        order = array("i", sorted(range(len(keys)), key=keys.__getitem__))
+
+        # Each distinct name, by the position in order of its first person
+        starts = [i for i in range(len(order)) if i == 0 or keys[order[i]] != keys[order[i - 1]]]
+
+        # Count the names in each trigram bucket, then lay the buckets out one
+        # after another, each listing its names in increasing order
+        cache = {}
+        gram_offsets = array("q", [0]) * (GRAM_BUCKETS + 1)
+        for start in starts:
+            for bucket in name_buckets(keys[order[start]], cache):
+                gram_offsets[bucket + 1] += 1
+        for bucket in range(GRAM_BUCKETS):
+            gram_offsets[bucket + 1] += gram_offsets[bucket]
+        gram_names = array("i", [0]) * gram_offsets[GRAM_BUCKETS]
+        ends = gram_offsets[:GRAM_BUCKETS]
+        for start in starts:
+            for bucket in name_buckets(keys[order[start]], cache):
+                gram_names[ends[bucket]] = start
+                ends[bucket] += 1
+        return cls(person_names, order, person_ids, gram_offsets, gram_names)
+
+    def key(self, person):
+        return self.person_names[person].lower()
+
+    def __getitem__(self, name):
+        start = bisect_left(self.order, name, key=self.key)
+        end = bisect_right(self.order, name, lo=start, key=self.key)
+        if start == end:
+            raise KeyError(name)
+        return {self.person_ids[person] for person in self.order[start:end]}
+
+    def __iter__(self):
+        previous = None
+        for person in self.order:
+            name = self.key(person)
+            if name != previous:
+                yield name
+                previous = name
+
+    def __len__(self):
+        return sum(1 for name in self)
+
+    def prefix(self, prefix, limit=10):
+        """
+        Returns up to limit person_ids whose name starts with prefix,
+        in order of name.
+        """
+        prefix = prefix.lower()
+        result = []
+        i = bisect_left(self.order, prefix, key=self.key)
+        while i < len(self.order) and len(result) < limit:
+            person = self.order[i]
+            if not self.key(person).startswith(prefix):
+                break
+            result.append(self.person_ids[person])
+            i += 1
+        return result
+
+    def fuzzy(self, name, limit=10, cutoff=0.6):
+        """
+        Returns up to limit person_ids whose name is most similar to name,
+        best match first, among the names sharing at least SHARED_GRAMS of
+        its trigrams wherever in the name the misspellings are.
+
+        Any such name is in one of the shortest lists of names of name's
+        trigram buckets (all but the number it must share, less one), so
+        only those are walked; the long lists of common trigrams are only
+        searched for the names found, and never read in full.
+        """
+        name = name.lower()
+        postings = sorted(
+            (self.gram_names[self.gram_offsets[bucket]:self.gram_offsets[bucket + 1]]
+             for bucket in name_buckets(name)),
+            key=len
+        )
+        need = max(1, math.ceil(len(postings) * SHARED_GRAMS))
+        rare = len(postings) - need + 1
+
+        shared = {}
+        for starts in postings[:rare]:
+            for start in starts:
+                shared[start] = shared.get(start, 0) + 1
+        for i in range(rare, len(postings)):
+            starts = postings[i]
+            left = len(postings) - i - 1
+            for start, count in list(shared.items()):
+                j = bisect_left(starts, start)
+                if j < len(starts) and starts[j] == start:
+                    shared[start] = count + 1
+                elif count + left < need:
+                    # Cannot share enough trigrams any more
+                    del shared[start]
+
+        matcher = SequenceMatcher()
+        matcher.set_seq2(name)
+        scored = []
+        for start, count in shared.items():
+            if count < need:
+                continue
+            key = self.key(self.order[start])
+            matcher.set_seq1(key)
+            # The quick upper bounds skip the full comparison for hopeless candidates
+            if matcher.real_quick_ratio() < cutoff or matcher.quick_ratio() < cutoff:
+                continue
+            score = matcher.ratio()
+            if score >= cutoff:
+                scored.append((-score, key, start))
+        scored.sort()
+
+        # Everyone with each name, in order
+        result = []
+        for _, key, start in scored:
+            i = start
+            while i < len(self.order) and len(result) < limit and self.key(self.order[i]) == key:
+                result.append(self.person_ids[self.order[i]])
+                i += 1
+            if len(result) == limit:
+                break
+        return result
+
+
+def grams(name):
+    """
+    Returns the distinct trigrams of a lowercased name, padded with spaces
+    so that its first and last letters are in as many trigrams as the rest.
+    """
+    padded = f"  {name}  "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def name_buckets(name, cache=None):
+    """
+    Returns the distinct trigram buckets of a lowercased name, looking
+    the bucket of each trigram up in cache, if given, before hashing it.
+    """
+    if cache is None:
+        return {gram_bucket(gram) for gram in grams(name)}
+    buckets = set()
+    for gram in grams(name):
+        bucket = cache.get(gram)
+        if bucket is None:
+            bucket = cache[gram] = gram_bucket(gram)
+        buckets.add(bucket)
+    return buckets
+
+
+def gram_bucket(gram):
+    # crc32 rather than hash, which changes between runs, as buckets are saved in snapshots
+    return zlib.crc32(gram.encode("utf-8")) & (GRAM_BUCKETS - 1)
+
+
+def most_movies(person_ids, people):
+    """
+    Returns the person who starred in the most movies.
+    """
+    return max(sorted(person_ids), key=lambda person_id: len(people[person_id]["movies"]))
+
+
+def earliest_birth(person_ids, people):
+    """
+    Returns the person born first, people with no known birth year last.
+    """
+    def birth(person_id):
+        year = people[person_id]["birth"]
+        return (0, int(year)) if year.isdigit() else (1, 0)
+    return min(sorted(person_ids), key=birth)
+
+
+# Non-interactive ways of picking one of several people sharing a name
+POLICIES = {
+    "most-movies": most_movies,
+    "earliest-birth": earliest_birth,
+}
+
+
+def disambiguate(person_ids, people, policy):
+    """
+    Returns the person_id that policy (a key of POLICIES) picks
+    among person_ids, looking their details up in people.
+    """
+    try:
+        choose = POLICIES[policy]
+    except KeyError:
+        raise ValueError(f"unknown disambiguation policy {policy}") from None
+    return choose(person_ids, people)
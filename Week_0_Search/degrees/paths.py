@@ -0,0 +1,176 @@
+import heapq
+from itertools import count, islice
+
+
+def shortest_path_dag(source, target, neighbors):
+    """
+    Returns the layered DAG of all shortest connections from source to
+    target, as a dictionary mapping each person on some shortest path
+    to the (movie_id, person_id) edges reaching it from the previous layer.
+
+    neighbors(person_id) gives the (movie_id, person_id) pairs of a person,
+    such as degrees.neighbors_for_person. Returns None if not connected.
+    """
+    if source == target:
+        raise ValueError("Source and target actors are one person!")
+
+    # Every edge into a person from the layer before it, not just the first one
+    parents = {source: []}
+    layer = [source]
+    while layer and target not in parents:
+        next_parents = {}
+        for person_id in layer:
+            for movie_id, neighbor_id in neighbors(person_id):
+                if neighbor_id in parents:
+                    continue
+                next_parents.setdefault(neighbor_id, []).append((movie_id, person_id))
+        parents.update(next_parents)
+        layer = list(next_parents)
+
+    if target not in parents:
+        return None
+
+    # Keep only the people that lead to the target
+    dag = {}
+    stack = [target]
+    while stack:
+        person_id = stack.pop()
+        if person_id in dag:
+            continue
+        dag[person_id] = parents[person_id]
+        stack.extend(parent_id for movie_id, parent_id in parents[person_id])
+    return dag
+
+
+def all_shortest_paths(source, target, neighbors):
+    """
+    Yields every shortest list of (movie_id, person_id) pairs
+    that connect the source to the target, one at a time.
+
+    Paths are walked back from the target through the DAG depth first,
+    so only one path and one edge iterator per degree are held at once,
+    however many paths there are.
+    """
+    dag = shortest_path_dag(source, target, neighbors)
+    if dag is None:
+        return
+
+    # Path back from the target, and the edges still to try at each step of it
+    path = []
+    edges = [iter(dag[target])]
+    person_ids = [target]
+    while edges:
+        edge = next(edges[-1], None)
+        if edge is None:
+            edges.pop()
+            person_ids.pop()
+            if path:
+                path.pop()
+            continue
+        movie_id, parent_id = edge
+        path.append((movie_id, person_ids[-1]))
+        if parent_id == source:
+            yield path[::-1]
+            path.pop()
+            continue
+        edges.append(iter(dag[parent_id]))
+        person_ids.append(parent_id)
+
+
+def restricted_shortest_path(source, target, neighbors, excluded_people=(), excluded_edges=()):
+    """
+    Returns the shortest list of (movie_id, person_id) pairs that connect
+    the source to the target without passing through excluded_people or
+    along excluded_edges, given as (person_id, movie_id, person_id) triples.
+
+    If no possible path, returns None.
+    """
+    parents = {source: None}
+    layer = [source]
+    while layer:
+        next_layer = []
+        for person_id in layer:
+            for movie_id, neighbor_id in neighbors(person_id):
+                if neighbor_id in parents or neighbor_id in excluded_people:
+                    continue
+                if (person_id, movie_id, neighbor_id) in excluded_edges:
+                    continue
+                parents[neighbor_id] = (movie_id, person_id)
+                if neighbor_id == target:
+                    return trace(parents, target)
+                next_layer.append(neighbor_id)
+        layer = next_layer
+    return None
+
+
+def shortest_simple_paths(source, target, neighbors):
+    """
+    Yields the simple (no person twice) lists of (movie_id, person_id)
+    pairs that connect the source to the target, shortest first,
+    by Yen's algorithm.
+
+    Each path costs one restricted search per person on the path before it,
+    and only candidates found so far are held, so taking the first k paths
+    stays bounded however many paths there are.
+    """
+    if source == target:
+        raise ValueError("Source and target actors are one person!")
+
+    path = restricted_shortest_path(source, target, neighbors)
+    if path is None:
+        return
+
+    found = []
+    seen = {tuple(path)}
+    candidates = []
+    # Breaks ties between candidates of equal length in order of discovery
+    counter = count()
+    while path is not None:
+        yield path
+        found.append(path)
+
+        # Branch off the new path at each person on it, other than the target
+        steps = [(None, source)] + path
+        for i in range(len(path)):
+            spur_id = steps[i][1]
+            root = path[:i]
+
+            # Leave the way every found path sharing this root went on from here,
+            # and the root itself, so the branch is new and the path stays simple
+            excluded_edges = set()
+            for other in found:
+                if other[:i] == root:
+                    movie_id, person_id = other[i]
+                    excluded_edges.add((spur_id, movie_id, person_id))
+            excluded_people = {person_id for movie_id, person_id in steps[:i]}
+
+            spur = restricted_shortest_path(spur_id, target, neighbors, excluded_people, excluded_edges)
+            if spur is None:
+                continue
+            candidate = root + spur
+            if tuple(candidate) not in seen:
+                seen.add(tuple(candidate))
+                heapq.heappush(candidates, (len(candidate), next(counter), candidate))
+
+        path = heapq.heappop(candidates)[2] if candidates else None
+
+
+def k_shortest_paths(source, target, k, neighbors):
+    """
+    Returns up to k of the shortest simple lists of (movie_id, person_id)
+    pairs that connect the source to the target, shortest first.
+    """
+    return list(islice(shortest_simple_paths(source, target, neighbors), k))
+
+
+def trace(parents, person_id):
+    """
+    Returns the (movie_id, person_id) path from the root of parents to person_id.
+    """
+    path = []
+    while parents[person_id] is not None:
+        movie_id, parent_id = parents[person_id]
+        path.append((movie_id, person_id))
+        person_id = parent_id
+    path.reverse()
+    return path
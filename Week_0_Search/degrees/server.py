@@ -0,0 +1,128 @@
+import json
+import sys
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs, urlparse
+
+import degrees
+
+
+class Handler(BaseHTTPRequestHandler):
+    """
+    Answers queries against the graph loaded into the degrees module:
+
+        GET /path?source=<person_id>&target=<person_id>[&bidirectional=1]
+        GET /people?name=<name>[&match=exact|prefix|fuzzy][&limit=<n>]
+    """
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        query = {key: values[0] for key, values in parse_qs(url.query).items()}
+        try:
+            if url.path == "/path":
+                body = path_response(query)
+            elif url.path == "/people":
+                body = people_response(query)
+            else:
+                return self.send_json(404, {"error": f"no such endpoint {url.path}"})
+        except KeyError as e:
+            return self.send_json(404, {"error": f"unknown {e.args[0]}"})
+        except ValueError as e:
+            return self.send_json(400, {"error": str(e)})
+        self.send_json(200, body)
+
+    def send_json(self, status, body):
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        # Keep the console quiet, a busy client would flood it
+        pass
+
+
+def path_response(query):
+    """
+    Returns the shortest path between the source and target person_ids.
+    """
+    source = query.get("source")
+    target = query.get("target")
+    if source is None or target is None:
+        raise ValueError("source and target are required")
+    if source not in degrees.people:
+        raise KeyError(f"person_id {source}")
+    if target not in degrees.people:
+        raise KeyError(f"person_id {target}")
+
+    start = time.perf_counter()
+    path = degrees.shortest_path(source, target, bidirectional=query.get("bidirectional") == "1")
+    seconds = time.perf_counter() - start
+
+    # Names and titles along the path, so clients need no data of their own
+    names = {source: degrees.people[source]["name"]}
+    titles = {}
+    for movie_id, person_id in path or []:
+        names[person_id] = degrees.people[person_id]["name"]
+        titles[movie_id] = degrees.movies[movie_id]["title"]
+    return {
+        "source": source,
+        "target": target,
+        "degrees": None if path is None else len(path),
+        "path": path,
+        "names": names,
+        "titles": titles,
+        "seconds": seconds
+    }
+
+
+def people_response(query):
+    """
+    Returns the people with the given name, or with names
+    starting with it or spelled like it.
+    """
+    name = query.get("name")
+    if name is None:
+        raise ValueError("name is required")
+    match = query.get("match", "exact")
+    limit = int(query.get("limit", 10))
+    if match == "exact":
+        person_ids = sorted(degrees.names.get(name.lower(), set()))
+    elif match == "prefix":
+        person_ids = degrees.names.prefix(name, limit)
+    elif match == "fuzzy":
+        person_ids = degrees.names.fuzzy(name, limit)
+    else:
+        raise ValueError(f"unknown match {match}")
+
+    result = []
+    for person_id in person_ids:
+        person = degrees.people[person_id]
+        result.append({"id": person_id, "name": person["name"], "birth": person["birth"]})
+    return result
+
+
+def main():
+    if len(sys.argv) not in (2, 3):
+        sys.exit("Usage: python server.py directory [port]")
+    directory = sys.argv[1]
+    port = int(sys.argv[2]) if len(sys.argv) == 3 else 8050
+
+    print("Loading data...")
+    degrees.load_graph(directory)
+    print("Data loaded.")
+
+    # One thread per request; searches only read the graph
+    server = ThreadingHTTPServer(("127.0.0.1", port), Handler)
+    print(f"Serving on http://127.0.0.1:{port}")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    server.server_close()
+
+
+if __name__ == "__main__":
+    main()
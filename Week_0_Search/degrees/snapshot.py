@@ -0,0 +1,298 @@
+import mmap
+import os
+import struct
+from array import array
+from bisect import bisect_left
+from collections.abc import Mapping, Sequence
+from contextlib import contextmanager
+
+from graph import Graph
+from nameindex import NameIndex
+
+# Bump VERSION whenever the layout below changes, so older snapshots get rebuilt
+MAGIC = b"DEGREES\0"
+VERSION = 2
+
+# Magic, version, number of sections, then (mtime_ns, size) of each CSV file
+HEADER = struct.Struct("<8sII6q")
+SECTION = struct.Struct("<qq")
+CSV_FILES = ("people.csv", "movies.csv", "stars.csv")
+
+# Stars added after the snapshot was taken live in an append-only log:
+# magic, version, the CSV signature, then (person, movie) integer pairs
+LOG_MAGIC = b"DEGDELTA"
+LOG_VERSION = 1
+LOG_HEADER = struct.Struct("<8sI4x6q")
+LOG_STAR = struct.Struct("<ii")
+
+# Graph attributes stored as integer arrays, with their array typecodes
+ARRAYS = (
+    ("person_offsets", "q"),
+    ("person_movies", "i"),
+    ("movie_offsets", "q"),
+    ("movie_people", "i"),
+)
+
+# Graph attributes stored as string tables
+STRINGS = (
+    "person_ids",
+    "person_names",
+    "person_births",
+    "movie_ids",
+    "movie_titles",
+    "movie_years",
+)
+
+
+def snapshot_path(directory):
+    return os.path.join(directory, "degrees.snapshot")
+
+
+def log_path(directory):
+    return os.path.join(directory, "degrees.delta")
+
+
+def signature(directory):
+    """
+    Returns the (mtime_ns, size) of each CSV file, flattened.
+    """
+    values = []
+    for filename in CSV_FILES:
+        stat = os.stat(os.path.join(directory, filename))
+        values.extend((stat.st_mtime_ns, stat.st_size))
+    return tuple(values)
+
+
+@contextmanager
+def atomic_write(path):
+    """
+    Opens a file to write in place of path. It is written next to path
+    and renamed over it when done, so readers never see half a file.
+    """
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        yield f
+    os.replace(temporary, path)
+
+
+def map_file(path, header, magic, version, csv_signature, kind, access=mmap.ACCESS_READ):
+    """
+    Returns (view, fields) for the file at path: a memoryview of it,
+    memory-mapped with access, and the fields of its header between the
+    version and the CSV signature. Every file next to a dataset starts
+    with a header of magic, version, any fields, then the CSV signature.
+
+    Raises ValueError if the file is not a kind file of this version
+    or was made from CSV files other than csv_signature.
+    """
+    with open(path, "rb") as f:
+        buffer = mmap.mmap(f.fileno(), 0, access=access)
+    view = memoryview(buffer)
+
+    if len(view) < header.size:
+        raise ValueError(f"truncated {kind}")
+    stored_magic, stored_version, *fields = header.unpack_from(view)
+    if stored_magic != magic or stored_version != version:
+        raise ValueError(f"not a {kind} of this version")
+    split = len(fields) - len(csv_signature)
+    if tuple(fields[split:]) != csv_signature:
+        raise ValueError(f"{kind} is out of date")
+    return view, fields[:split]
+
+
+def section(view, offset, size, kind):
+    """
+    Returns size bytes of view from offset, raising ValueError if
+    the kind file is too short to hold them.
+    """
+    if offset + size > len(view):
+        raise ValueError(f"truncated {kind}")
+    return view[offset:offset + size]
+
+
+def load(directory):
+    """
+    Returns the Graph for directory, memory-mapped from its snapshot
+    when that is up to date, else loaded from the CSV files and
+    snapshotted for next time. Stars logged since (see delta.py)
+    are added on top.
+    """
+    current = signature(directory)
+    try:
+        graph = read(snapshot_path(directory), current)
+    except (OSError, ValueError):
+        graph = Graph.from_csv(directory)
+        try:
+            write(graph, snapshot_path(directory), current)
+        except OSError:
+            # A read-only dataset directory just means no snapshot
+            pass
+    graph.add_stars(read_log(log_path(directory), current))
+    return graph
+
+
+def read_log(path, csv_signature):
+    """
+    Returns the (person, movie) pairs logged at path, or none if there
+    is no log or it was started for CSV files other than csv_signature.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return []
+    if len(data) < LOG_HEADER.size:
+        return []
+    magic, version, *stored_signature = LOG_HEADER.unpack_from(data)
+    if magic != LOG_MAGIC or version != LOG_VERSION or tuple(stored_signature) != csv_signature:
+        return []
+
+    # A record cut short by an interrupted append is dropped
+    end = len(data) - (len(data) - LOG_HEADER.size) % LOG_STAR.size
+    return list(LOG_STAR.iter_unpack(data[LOG_HEADER.size:end]))
+
+
+def append_log(path, stars, csv_signature):
+    """
+    Append (person, movie) pairs to the log at path, starting
+    a new log if there is none for csv_signature.
+    """
+    try:
+        with open(path, "rb") as f:
+            header = f.read(LOG_HEADER.size)
+        magic, version, *stored_signature = LOG_HEADER.unpack(header)
+        current = magic == LOG_MAGIC and version == LOG_VERSION and tuple(stored_signature) == csv_signature
+    except (OSError, struct.error):
+        current = False
+
+    with open(path, "ab" if current else "wb") as f:
+        if not current:
+            f.write(LOG_HEADER.pack(LOG_MAGIC, LOG_VERSION, *csv_signature))
+        for person, movie in stars:
+            f.write(LOG_STAR.pack(person, movie))
+
+
+def write(graph, path, csv_signature):
+    """
+    Write graph to a snapshot file at path, tagged with csv_signature.
+    """
+    sections = [getattr(graph, name) for name, typecode in ARRAYS]
+    for name in STRINGS:
+        sections.extend(encode_strings(getattr(graph, name)))
+    sections.append(sorted_order(graph.person_ids))
+    sections.append(sorted_order(graph.movie_ids))
+    sections.append(graph.names.order)
+    sections.append(graph.names.gram_offsets)
+    sections.append(graph.names.gram_names)
+
+    # Every section starts 8-byte aligned so it can be cast in place
+    table = []
+    offset = align(HEADER.size + SECTION.size * len(sections))
+    for data in sections:
+        size = memoryview(data).nbytes
+        table.append((offset, size))
+        offset = align(offset + size)
+
+    with atomic_write(path) as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(sections), *csv_signature))
+        for entry in table:
+            f.write(SECTION.pack(*entry))
+        for (offset, size), data in zip(table, sections):
+            f.seek(offset)
+            f.write(data)
+
+
+def read(path, csv_signature):
+    """
+    Returns the Graph memory-mapped from the snapshot file at path.
+
+    Raises ValueError if the file is not a snapshot of this version
+    or was taken from CSV files other than csv_signature.
+    """
+    view, (count,) = map_file(path, HEADER, MAGIC, VERSION, csv_signature, "snapshot")
+    table = section(view, HEADER.size, SECTION.size * count, "snapshot")
+
+    sections = []
+    for offset, size in SECTION.iter_unpack(table):
+        sections.append(section(view, offset, size, "snapshot"))
+    sections.reverse()
+
+    arrays = {name: sections.pop().cast(typecode) for name, typecode in ARRAYS}
+    strings = {name: StringTable(sections.pop().cast("q"), sections.pop()) for name in STRINGS}
+    person_order = sections.pop().cast("i")
+    movie_order = sections.pop().cast("i")
+    name_order = sections.pop().cast("i")
+    gram_offsets = sections.pop().cast("q")
+    gram_names = sections.pop().cast("i")
+
+    return Graph(
+        **strings,
+        **arrays,
+        person_index=SortedIndex(strings["person_ids"], person_order),
+        movie_index=SortedIndex(strings["movie_ids"], movie_order),
+        names=NameIndex(strings["person_names"], name_order, strings["person_ids"], gram_offsets, gram_names)
+    )
+
+
+class StringTable(Sequence):
+    """
+    Sequence of strings decoded on demand from an offsets array and a UTF-8 blob.
+    """
+
+    def __init__(self, offsets, blob):
+        self.offsets = offsets
+        self.blob = blob
+
+    def __getitem__(self, i):
+        if not 0 <= i < len(self):
+            raise IndexError("string table index out of range")
+        return str(self.blob[self.offsets[i]:self.offsets[i + 1]], "utf-8")
+
+    def __len__(self):
+        return len(self.offsets) - 1
+
+
+class SortedIndex(Mapping):
+    """
+    Maps the strings of a table to their positions, by binary search
+    over the positions sorted by string.
+    """
+
+    def __init__(self, table, order):
+        self.table = table
+        self.order = order
+
+    def __getitem__(self, key):
+        i = bisect_left(self.order, key, key=self.table.__getitem__)
+        if i < len(self.order) and self.table[self.order[i]] == key:
+            return self.order[i]
+        raise KeyError(key)
+
+    def __iter__(self):
+        return iter(self.table)
+
+    def __len__(self):
+        return len(self.table)
+
+
+def encode_strings(strings):
+    """
+    Returns (offsets, blob) for a string table.
+    """
+    offsets = array("q", [0])
+    blob = bytearray()
+    for string in strings:
+        blob += string.encode("utf-8")
+        offsets.append(len(blob))
+    return offsets, blob
+
+
+def sorted_order(keys):
+    """
+    Returns the positions of keys, in order of the keys.
+    """
+    return array("i", sorted(range(len(keys)), key=keys.__getitem__))
+
+
+def align(offset):
+    return (offset + 7) & ~7
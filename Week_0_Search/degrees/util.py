@@ -1,3 +1,9 @@
+import json
+import time
+import tracemalloc
+from collections import OrderedDict, deque
+
+
 class Node():
     def __init__(self, state, parent, action):
         self.state = state
@@ -7,13 +13,16 @@ class Node():
 
 class StackFrontier():
     def __init__(self):
-        self.frontier = []
+        self.frontier = deque()
+        # Companion set of the states in the frontier, for constant-time lookups
+        self.states = set()
 
     def add(self, node):
         self.frontier.append(node)
+        self.states.add(node.state)
 
     def contains_state(self, state):
-        return any(node.state == state for node in self.frontier)
+        return state in self.states
 
     def empty(self):
         return len(self.frontier) == 0
@@ -22,8 +31,8 @@ class StackFrontier():
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[-1]
-            self.frontier = self.frontier[:-1]
+            node = self.frontier.pop()
+            self.states.discard(node.state)
             return node
 
 
@@ -33,6 +42,144 @@ class QueueFrontier(StackFrontier):
         if self.empty():
             raise Exception("empty frontier")
         else:
-            node = self.frontier[0]
-            self.frontier = self.frontier[1:]
+            node = self.frontier.popleft()
+            self.states.discard(node.state)
             return node
+
+
+class NeighborCache():
+    """
+    Least-recently-used cache of neighbor lists, bounded by the
+    total number of neighbors held rather than the number of states,
+    so a few hub states cannot crowd out memory.
+    """
+
+    def __init__(self, neighbors, max_neighbors):
+        self.neighbors = neighbors
+        self.max_neighbors = max_neighbors
+        self.entries = OrderedDict()
+        self.size = 0
+
+    def __getitem__(self, state):
+        if state in self.entries:
+            self.entries.move_to_end(state)
+            return self.entries[state]
+
+        result = self.neighbors(state)
+        if len(result) <= self.max_neighbors:
+            self.entries[state] = result
+            self.size += len(result)
+            while self.size > self.max_neighbors:
+                _, evicted = self.entries.popitem(last=False)
+                self.size -= len(evicted)
+        return result
+
+    def __contains__(self, state):
+        return state in self.entries
+
+    def discard(self, state):
+        """
+        Drop the cached neighbors of state, if any, after they changed.
+        """
+        if state in self.entries:
+            self.size -= len(self.entries.pop(state))
+
+
+class SearchStats():
+    """
+    Opt-in measurements of one search: nodes expanded, peak frontier size,
+    time spent generating neighbors, total time and, if trace_memory,
+    the peak memory allocated while searching (else peak_memory is None).
+
+    Searches given no SearchStats skip all of this, so leaving it off costs
+    one comparison per node at most. Tracing memory slows every allocation
+    down, several times over for a search, so the times of a search that
+    traces memory overstate how long it takes without.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.nodes_expanded = 0
+        self.peak_frontier = 0
+        self.neighbor_seconds = 0.0
+        self.total_seconds = 0.0
+        self.peak_memory = 0 if trace_memory else None
+
+    def __enter__(self):
+        if self.trace_memory:
+            # Measure memory relative to what was allocated before the search
+            self.started_tracing = not tracemalloc.is_tracing()
+            if self.started_tracing:
+                tracemalloc.start()
+            self.baseline_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.total_seconds += time.perf_counter() - self.started
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] - self.baseline_memory
+            self.peak_memory = max(self.peak_memory, peak)
+            if self.started_tracing:
+                tracemalloc.stop()
+        return False
+
+    def timed(self, neighbors):
+        """
+        Wrap a neighbors function so each call counts as expanding a node
+        and the time taken to produce its neighbors counts as neighbor
+        generation. Neighbors are timed one at a time as the search takes
+        them, so a search that stops early still does no more work; the
+        price is two clock reads per neighbor.
+        """
+        def timed_neighbors(state):
+            self.nodes_expanded += 1
+            started = time.perf_counter()
+            iterator = iter(neighbors(state))
+            self.neighbor_seconds += time.perf_counter() - started
+            return self.timed_iterator(iterator)
+        return timed_neighbors
+
+    def timed_iterator(self, iterator):
+        """
+        Yields the items of iterator, counting the time taken to produce
+        each as neighbor generation, up to when the search stops taking them.
+        """
+        clock = time.perf_counter
+        seconds = 0.0
+        try:
+            started = clock()
+            for item in iterator:
+                seconds += clock() - started
+                yield item
+                started = clock()
+            seconds += clock() - started
+        finally:
+            self.neighbor_seconds += seconds
+
+    def frontier(self, size):
+        """
+        Record the current size of the frontier.
+        """
+        if size > self.peak_frontier:
+            self.peak_frontier = size
+
+    def as_dict(self):
+        return {
+            "nodes_expanded": self.nodes_expanded,
+            "peak_frontier": self.peak_frontier,
+            "neighbor_seconds": self.neighbor_seconds,
+            "total_seconds": self.total_seconds,
+            "peak_memory": self.peak_memory,
+        }
+
+    def to_json(self):
+        return json.dumps(self.as_dict())
+
+    def dump(self, filename):
+        """
+        Write the stats to filename as a JSON object.
+        """
+        with open(filename, "w") as f:
+            json.dump(self.as_dict(), f, indent=4)
@@ -0,0 +1,221 @@
+import sys
+
+import numpy as np
+
+# Moves between flat cell indices, by the offset they add (see GridMaze.moves)
+ACTIONS = ("up", "down", "left", "right")
+
+
+class GridMaze():
+    """
+    Maze for very large grids: the same text format as maze.Maze, but cells
+    are flat integer indices (row * width + col), walls and explored cells
+    are bitmaps packed eight cells to a byte, and solving expands a whole
+    breadth-first layer at a time with NumPy.
+
+    A 10,000 x 10,000 maze takes about 12.5MB of walls and 37.5MB of search
+    bitmaps, where maze.Maze would need gigabytes of lists and tuples.
+    """
+
+    def __init__(self, filename):
+
+        # Read the file as bytes, dropping carriage returns
+        contents = np.fromfile(filename, dtype=np.uint8)
+        if np.any(contents == ord("\r")):
+            contents = contents[contents != ord("\r")]
+
+        # Validate start and goal
+        if np.count_nonzero(contents == ord("A")) != 1:
+            raise Exception("maze must have exactly one start point")
+        if np.count_nonzero(contents == ord("B")) != 1:
+            raise Exception("maze must have exactly one goal")
+
+        # Determine height and width of maze from where the lines end
+        ends = np.flatnonzero(contents == ord("\n"))
+        if len(contents) and contents[-1] != ord("\n"):
+            ends = np.append(ends, len(contents))
+        starts = np.concatenate(([0], ends[:-1] + 1))
+        lengths = ends - starts
+        self.height = len(ends)
+        self.width = int(lengths.max())
+
+        # Lay the lines out on the grid, short lines padded with empty cells
+        if len(contents) == self.height * (self.width + 1) and np.all(lengths == self.width):
+            # Lines of equal length are a view of the file with the newlines left off
+            grid = contents.reshape(self.height, self.width + 1)[:, :self.width]
+        elif np.all(lengths == self.width):
+            grid = contents[contents != ord("\n")]
+        else:
+            grid = np.full(self.height * self.width, ord(" "), dtype=np.uint8)
+            for i, (start, length) in enumerate(zip(starts, lengths)):
+                grid[i * self.width:i * self.width + length] = contents[start:start + length]
+        del contents
+
+        self.start = int(np.flatnonzero(grid == ord("A"))[0])
+        self.goal = int(np.flatnonzero(grid == ord("B"))[0])
+
+        # Keep track of walls, one bit per cell
+        walls = (grid != ord(" ")).reshape(-1)
+        del grid
+        walls[self.start] = walls[self.goal] = False
+        self.walls = np.packbits(walls)
+        del walls
+
+        self.size = self.height * self.width
+        self.solution = None
+        self.explored = None
+        self.num_explored = 0
+
+
+    def cell(self, index):
+        """Returns the (row, col) of a flat cell index."""
+        return divmod(index, self.width)
+
+
+    def index(self, row, col):
+        """Returns the flat index of the cell at (row, col)."""
+        return row * self.width + col
+
+
+    def is_wall(self, index):
+        return bool(get_bits(self.walls, index))
+
+
+    def moves(self):
+        """Returns (action, offset) for each move between flat indices."""
+        return list(zip(ACTIONS, (-self.width, self.width, -1, 1)))
+
+
+    def neighbors(self, index):
+        """
+        Returns (action, index) pairs for the open cells next to a cell,
+        computed from its flat index.
+        """
+        row, col = divmod(index, self.width)
+        result = []
+        if row > 0 and not self.is_wall(index - self.width):
+            result.append(("up", index - self.width))
+        if row < self.height - 1 and not self.is_wall(index + self.width):
+            result.append(("down", index + self.width))
+        if col > 0 and not self.is_wall(index - 1):
+            result.append(("left", index - 1))
+        if col < self.width - 1 and not self.is_wall(index + 1):
+            result.append(("right", index + 1))
+        return result
+
+
+    def layer_neighbors(self, layer):
+        """
+        Returns the distinct open cells next to any cell of layer,
+        an array of flat indices.
+        """
+        width = self.width
+        cols = layer % width
+        candidates = np.concatenate((
+            layer[layer >= width] - width,
+            layer[layer < self.size - width] + width,
+            layer[cols > 0] - 1,
+            layer[cols < width - 1] + 1,
+        ))
+        # Sorting then dropping repeats is much cheaper than np.unique here
+        candidates.sort()
+        distinct = np.empty(len(candidates), dtype=bool)
+        distinct[:1] = True
+        np.not_equal(candidates[1:], candidates[:-1], out=distinct[1:])
+        candidates = candidates[distinct]
+        return candidates[get_bits(self.walls, candidates) == 0]
+
+
+    def solve(self):
+        """
+        Finds a shortest solution to maze, if one exists, by breadth-first
+        search over whole layers of cells at a time.
+
+        Explored cells are marked in the explored bitmap, and the depth of
+        each modulo 3 in two more bitmaps: a cell's neighbors are at most one
+        layer apart from it, so that is enough to walk back from the goal.
+        """
+        bitmap_size = len(self.walls)
+        self.explored = np.zeros(bitmap_size, dtype=np.uint8)
+        depth_bits = (np.zeros(bitmap_size, dtype=np.uint8), np.zeros(bitmap_size, dtype=np.uint8))
+
+        layer = np.array([self.start], dtype=np.int64)
+        set_bits(self.explored, layer)
+        self.num_explored = 1
+        depth = 0
+        while not get_bits(self.explored, self.goal):
+            layer = self.layer_neighbors(layer)
+            layer = layer[get_bits(self.explored, layer) == 0]
+            if len(layer) == 0:
+                raise Exception("no solution")
+
+            depth += 1
+            set_bits(self.explored, layer)
+            for bit, bits in enumerate(depth_bits):
+                if depth % 3 >> bit & 1:
+                    set_bits(bits, layer)
+            self.num_explored += len(layer)
+
+        self.solution = self.backtrack(depth, depth_bits)
+
+
+    def backtrack(self, depth, depth_bits):
+        """
+        Returns (actions, cells) from start to the goal at depth, following
+        each cell back to the explored neighbor one layer nearer the start.
+        """
+        actions = []
+        cells = []
+        index = self.goal
+        while depth > 0:
+            depth -= 1
+            for action, offset in self.moves():
+                previous = index - offset
+                if not self.adjacent(index, previous) or not get_bits(self.explored, previous):
+                    continue
+                if layer_mod_3(depth_bits, previous) == depth % 3:
+                    actions.append(action)
+                    cells.append(index)
+                    index = previous
+                    break
+        actions.reverse()
+        cells.reverse()
+        return (actions, cells)
+
+
+    def adjacent(self, index, other):
+        """Returns whether two flat indices are neighboring cells on the grid."""
+        if not 0 <= other < self.size:
+            return False
+        # Stepping left or right must not wrap onto another row
+        return abs(index - other) == self.width or index // self.width == other // self.width
+
+
+def get_bits(bits, indices):
+    """Returns the bits (0 or 1) of a packed bitmap at flat indices."""
+    return (bits[indices >> 3] >> (7 - (indices & 7))) & 1
+
+
+def set_bits(bits, indices):
+    """Sets the bits of a packed bitmap at flat indices, which may repeat."""
+    np.bitwise_or.at(bits, indices >> 3, (128 >> (indices & 7)).astype(np.uint8))
+
+
+def layer_mod_3(depth_bits, index):
+    return int(get_bits(depth_bits[0], index)) | int(get_bits(depth_bits[1], index)) << 1
+
+
+def main():
+    if len(sys.argv) != 2:
+        sys.exit("Usage: python gridmaze.py maze.txt")
+
+    m = GridMaze(sys.argv[1])
+    print(f"Maze: {m.height} x {m.width}")
+    print("Solving...")
+    m.solve()
+    print("States Explored:", m.num_explored)
+    print("Solution length:", len(m.solution[0]))
+
+
+if __name__ == "__main__":
+    main()
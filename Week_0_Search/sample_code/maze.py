@@ -1,4 +1,13 @@
+import heapq
+import json
+import os
+import struct
 import sys
+import time
+import tracemalloc
+from array import array
+from collections import deque
+from itertools import chain
 
 class Node():
     def __init__(self, state, parent, action):
@@ -39,10 +48,139 @@ class QueueFrontier(StackFrontier):
             self.frontier = self.frontier[1:]
             return node
 
+
+class PriorityFrontier():
+    """
+    Frontier that removes the node of lowest priority first, kept in a
+    binary heap. Equal priorities come out in the order they were added.
+    """
+
+    def __init__(self):
+        self.frontier = []
+        self.added = 0
+
+    def add(self, node, priority):
+        heapq.heappush(self.frontier, (priority, self.added, node))
+        self.added += 1
+
+    def empty(self):
+        return len(self.frontier) == 0
+
+    def remove(self):
+        if self.empty():
+            raise Exception("empty frontier")
+        else:
+            return heapq.heappop(self.frontier)[2]
+
+
+def manhattan(state, goal):
+    """Number of moves from state to goal with no walls in the way."""
+    return abs(state[0] - goal[0]) + abs(state[1] - goal[1])
+
+
+def octile(state, goal):
+    """
+    Distance from state to goal if diagonal moves cost sqrt(2). Never more
+    than manhattan, so it also never overestimates in this 4-connected maze,
+    but guides the search less.
+    """
+    rows, cols = abs(state[0] - goal[0]), abs(state[1] - goal[1])
+    return max(rows, cols) + (2 ** 0.5 - 1) * min(rows, cols)
+
+
+ALGORITHMS = ("dfs", "bfs", "greedy", "astar", "jps", "field")
+HEURISTICS = {
+    "manhattan": manhattan,
+    "octile": octile,
+}
+
+# Goal distance fields are saved next to the maze file: magic, version, height,
+# width, then the (mtime_ns, size) of the maze file they were computed from
+DISTANCES_MAGIC = b"MAZEDIST"
+DISTANCES_VERSION = 1
+DISTANCES_HEADER = struct.Struct("<8sIiiqq")
+
+# Distance recorded for walls and cells that cannot reach the goal
+UNREACHABLE = -1
+
+
+class SearchStats():
+    """
+    Opt-in measurements of one search: nodes expanded, peak frontier size,
+    time spent generating neighbors, total time and, if trace_memory,
+    the peak memory allocated while searching (else peak_memory is None).
+    Tracing memory slows the search down, so its times are then overstated.
+    """
+
+    def __init__(self, trace_memory=False):
+        self.trace_memory = trace_memory
+        self.nodes_expanded = 0
+        self.peak_frontier = 0
+        self.neighbor_seconds = 0.0
+        self.total_seconds = 0.0
+        self.peak_memory = 0 if trace_memory else None
+
+    def __enter__(self):
+        if self.trace_memory:
+            self.started_tracing = not tracemalloc.is_tracing()
+            if self.started_tracing:
+                tracemalloc.start()
+            self.baseline_memory = tracemalloc.get_traced_memory()[0]
+            tracemalloc.reset_peak()
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc_info):
+        self.total_seconds += time.perf_counter() - self.started
+        if self.trace_memory:
+            peak = tracemalloc.get_traced_memory()[1] - self.baseline_memory
+            self.peak_memory = max(self.peak_memory, peak)
+            if self.started_tracing:
+                tracemalloc.stop()
+        return False
+
+    def timed(self, neighbors):
+        """
+        Wrap a neighbors function so each call counts as expanding
+        a node and its time counts as neighbor generation.
+        """
+        def timed_neighbors(state):
+            self.nodes_expanded += 1
+            started = time.perf_counter()
+            result = neighbors(state)
+            self.neighbor_seconds += time.perf_counter() - started
+            return result
+        return timed_neighbors
+
+    def frontier(self, size):
+        if size > self.peak_frontier:
+            self.peak_frontier = size
+
+    def as_dict(self):
+        return {
+            "nodes_expanded": self.nodes_expanded,
+            "peak_frontier": self.peak_frontier,
+            "neighbor_seconds": self.neighbor_seconds,
+            "total_seconds": self.total_seconds,
+            "peak_memory": self.peak_memory,
+        }
+
+    def to_json(self):
+        return json.dumps(self.as_dict())
+
+    def dump(self, filename):
+        with open(filename, "w") as f:
+            json.dump(self.as_dict(), f, indent=4)
+
+
 class Maze():
 
     def __init__(self, filename):
 
+        # Remember which version of the file this is, for the goal distance field
+        self.filename = filename
+        self.signature = file_signature(filename)
+
         # Read file and set height and width of maze
         with open(filename) as f:
             contents = f.read()
@@ -79,6 +217,7 @@ class Maze():
             self.walls.append(row)
 
         self.solution = None
+        self.distances = None
 
 
     def print(self):
@@ -116,15 +255,146 @@ class Maze():
         return result
 
 
-    def solve(self):
-        """Finds a solution to maze, if one exists."""
+    def solve(self, stats=False, algorithm="dfs", heuristic="manhattan", trace_memory=False):
+        """
+        Finds a solution to maze, if one exists.
+
+        algorithm is one of ALGORITHMS: depth-first, breadth-first,
+        greedy best-first, A* or jump point search, the last three guided
+        by heuristic, one of HEURISTICS, or descending the goal distance
+        field (see distance_field).
+
+        If stats is True, also returns the SearchStats of the search,
+        with its peak memory traced if trace_memory is True.
+        """
+        if algorithm not in ALGORITHMS:
+            raise ValueError(f"unknown algorithm {algorithm}")
+        if heuristic not in HEURISTICS:
+            raise ValueError(f"unknown heuristic {heuristic}")
+
+        def run(neighbors, search_stats=None):
+            if algorithm == "field":
+                self.field_search(neighbors, HEURISTICS[heuristic], search_stats)
+            elif algorithm == "jps":
+                self.jump_point_search(HEURISTICS[heuristic], search_stats)
+            elif algorithm in ("greedy", "astar"):
+                greedy = algorithm == "greedy"
+                self.informed_search(neighbors, HEURISTICS[heuristic], greedy, search_stats)
+            else:
+                frontier = StackFrontier() if algorithm == "dfs" else QueueFrontier()
+                self.search(neighbors, search_stats, frontier)
+
+        if not stats:
+            run(self.neighbors)
+            return None
+        with SearchStats(trace_memory) as search_stats:
+            run(search_stats.timed(self.neighbors), search_stats)
+        return search_stats
+
+
+    def solve_from(self, start, stats=False, algorithm="field", heuristic="manhattan", trace_memory=False):
+        """
+        Finds a solution from start, a (row, col) cell, instead of
+        the maze's own start point. See solve for the arguments.
+        """
+        row, col = start
+        if not (0 <= row < self.height and 0 <= col < self.width) or self.walls[row][col]:
+            raise ValueError(f"start {start} is not an empty cell")
+        original, self.start = self.start, start
+        try:
+            return self.solve(stats, algorithm, heuristic, trace_memory)
+        finally:
+            self.start = original
+
+
+    def distance_field(self):
+        """
+        Returns the number of moves from each cell to the goal, as a flat
+        array indexed by row * width + col, UNREACHABLE for walls and cells
+        cut off from the goal.
+
+        The field is read from next to the maze file, or computed by one
+        breadth-first search from the goal and saved there for next time.
+        Returns None if the maze file changed since this Maze read it.
+        """
+        if file_signature(self.filename) != self.signature:
+            return None
+        if self.distances is None:
+            path = distances_path(self.filename)
+            try:
+                self.distances = read_distances(path, self.height, self.width, self.signature)
+            except (OSError, ValueError):
+                self.distances = self.goal_distances()
+                try:
+                    write_distances(path, self.distances, self.height, self.width, self.signature)
+                except OSError:
+                    pass
+        return self.distances
+
+
+    def goal_distances(self):
+        """Breadth-first search from the goal, see distance_field."""
+        distances = array("i", [UNREACHABLE]) * (self.height * self.width)
+        goal = self.goal[0] * self.width + self.goal[1]
+        distances[goal] = 0
+        queue = deque([self.goal])
+        while queue:
+            state = queue.popleft()
+            distance = distances[state[0] * self.width + state[1]] + 1
+            for action, (row, col) in self.neighbors(state):
+                index = row * self.width + col
+                if distances[index] == UNREACHABLE:
+                    distances[index] = distance
+                    queue.append((row, col))
+        return distances
+
+
+    def field_search(self, neighbors, heuristic, stats=None):
+        """
+        Walks from start to goal down the goal distance field, always to a
+        neighbor one move nearer, in time proportional to the path length.
+        Falls back to A* search if the maze file changed since it was read.
+        """
+        distances = self.distance_field()
+        if distances is None:
+            self.informed_search(neighbors, heuristic, stats=stats)
+            return
+
+        self.explored = set()
+        state = self.start
+        distance = distances[state[0] * self.width + state[1]]
+        if distance == UNREACHABLE:
+            raise Exception("no solution")
+
+        actions = []
+        cells = []
+        while distance > 0:
+            self.explored.add(state)
+            for action, (row, col) in neighbors(state):
+                if distances[row * self.width + col] == distance - 1:
+                    actions.append(action)
+                    cells.append((row, col))
+                    state = (row, col)
+                    distance -= 1
+                    break
+        self.num_explored = len(self.explored) + 1
+        self.solution = (actions, cells)
+
+
+    def search(self, neighbors, stats=None, frontier=None):
+        """
+        Uninformed search from start to goal, using neighbors(state):
+        depth first with a StackFrontier (the default),
+        breadth first with a QueueFrontier.
+        """
 
         # Keep track of number of states explored
         self.num_explored = 0
 
         # Initialize frontier to just the starting position
         start = Node(state=self.start, parent=None, action=None)
-        frontier = StackFrontier()
+        if frontier is None:
+            frontier = StackFrontier()
         frontier.add(start)
 
         # Initialize an empty explored set
@@ -138,92 +408,331 @@ class Maze():
                 raise Exception("no solution")
 
             # Choose a node from the frontier
+            if stats is not None:
+                stats.frontier(len(frontier.frontier))
             node = frontier.remove()
             self.num_explored += 1
 
             # If node is the goal, then we have a solution
             if node.state == self.goal:
-                actions = []
-                cells = []
-                while node.parent is not None:
-                    actions.append(node.action)
-                    cells.append(node.state)
-                    node = node.parent
-                actions.reverse()
-                cells.reverse()
-                self.solution = (actions, cells)
+                self.solution = self.backtrack(node)
                 return
 
             # Mark node as explored
             self.explored.add(node.state)
 
             # Add neighbors to frontier
-            for action, state in self.neighbors(node.state):
+            for action, state in neighbors(node.state):
                 if not frontier.contains_state(state) and state not in self.explored:
                     child = Node(state=state, parent=node, action=action)
                     frontier.add(child)
 
 
-    def output_image(self, filename, show_solution=True, show_explored=False):
-        from PIL import Image, ImageDraw
-        cell_size = 50
-        cell_border = 2
+    def informed_search(self, neighbors, heuristic, greedy=False, stats=None):
+        """
+        Search from start to goal, expanding the node that looks closest to
+        the goal first: by heuristic(state, goal) alone if greedy, else by
+        the moves so far plus heuristic (A*), which finds a shortest path.
+        """
+        self.num_explored = 0
+        self.explored = set()
 
-        # Create a blank canvas
-        img = Image.new(
-            "RGBA",
-            (self.width * cell_size, self.height * cell_size),
-            "black"
-        )
-        draw = ImageDraw.Draw(img)
+        # Fewest moves found so far to each state reached
+        costs = {self.start: 0}
+        frontier = PriorityFrontier()
+        frontier.add(Node(state=self.start, parent=None, action=None), 0)
 
-        solution = self.solution[1] if self.solution is not None else None
-        for i, row in enumerate(self.walls):
-            for j, col in enumerate(row):
+        while not frontier.empty():
+            if stats is not None:
+                stats.frontier(len(frontier.frontier))
+            node = frontier.remove()
 
-                # Walls
-                if col:
-                    fill = (40, 40, 40)
+            # A state added again at a lower cost leaves its old entry behind
+            if node.state in self.explored:
+                continue
+            self.num_explored += 1
 
-                # Start
-                elif (i, j) == self.start:
-                    fill = (255, 0, 0)
+            if node.state == self.goal:
+                self.solution = self.backtrack(node)
+                return
+            self.explored.add(node.state)
 
-                # Goal
-                elif (i, j) == self.goal:
-                    fill = (0, 171, 28)
+            cost = costs[node.state] + 1
+            for action, state in neighbors(node.state):
+                if state in self.explored:
+                    continue
+                # Greedy search never revisits a state, A* does when it finds a shorter way
+                if state in costs and (greedy or costs[state] <= cost):
+                    continue
+                costs[state] = cost
+                estimate = heuristic(state, self.goal)
+                # Among equal estimates of the total, prefer the node nearer the goal
+                priority = estimate if greedy else (cost + estimate, estimate)
+                frontier.add(Node(state=state, parent=node, action=action), priority)
+
+        raise Exception("no solution")
+
+
+    def jump_point_search(self, heuristic, stats=None):
+        """
+        A* search over jump points only: the start, the goal and the cells
+        where a straight walk has to stop and consider turning. Walks across
+        open space are scanned rather than expanded cell by cell, so far
+        fewer nodes are explored on open mazes. Finds a shortest path.
+
+        Only jump points count as explored.
+        """
+        successors = self.jump_points if stats is None else stats.timed(self.jump_points)
+        self.num_explored = 0
+        self.explored = set()
 
-                # Solution
-                elif solution is not None and show_solution and (i, j) in solution:
-                    fill = (220, 235, 113)
+        costs = {self.start: 0}
+        frontier = PriorityFrontier()
+        frontier.add(Node(state=self.start, parent=None, action=None), 0)
 
-                # Explored
-                elif solution is not None and show_explored and (i, j) in self.explored:
-                    fill = (212, 97, 85)
+        while not frontier.empty():
+            if stats is not None:
+                stats.frontier(len(frontier.frontier))
+            node = frontier.remove()
+            if node.state in self.explored:
+                continue
+            self.num_explored += 1
 
-                # Empty cell
-                else:
-                    fill = (237, 240, 252)
-
-                # Draw cell
-                draw.rectangle(
-                    ([(j * cell_size + cell_border, i * cell_size + cell_border),
-                      ((j + 1) * cell_size - cell_border, (i + 1) * cell_size - cell_border)]),
-                    fill=fill
-                )
-
-        img.save(filename)
-
-
-if len(sys.argv) != 2:
-    sys.exit("Usage: python maze.py maze.txt")
-
-m = Maze(sys.argv[1])
-print("Maze:")
-m.print()
-print("Solving...")
-m.solve()
-print("States Explored:", m.num_explored)
-print("Solution:")
-m.print()
-m.output_image("maze.png", show_explored=True)
\ No newline at end of file
+            if node.state == self.goal:
+                self.solution = self.interpolate(node)
+                return
+            self.explored.add(node.state)
+
+            for state in successors(node):
+                if state in self.explored:
+                    continue
+                cost = costs[node.state] + manhattan(node.state, state)
+                if costs.get(state, cost + 1) <= cost:
+                    continue
+                costs[state] = cost
+                estimate = heuristic(state, self.goal)
+                frontier.add(Node(state=state, parent=node, action=None), (cost + estimate, estimate))
+
+        raise Exception("no solution")
+
+
+    def jump_points(self, node):
+        """
+        Returns the jump points reached by walking straight from node,
+        in the directions worth walking given the one node was reached from.
+        """
+        row, col = node.state
+        if node.parent is None:
+            directions = [(-1, 0), (1, 0), (0, -1), (0, 1)]
+        else:
+            parent_row, parent_col = node.parent.state
+            drow = (row > parent_row) - (row < parent_row)
+            dcol = (col > parent_col) - (col < parent_col)
+            # Keep going, or turn off to either side; never go back
+            if dcol:
+                directions = [(0, dcol), (-1, 0), (1, 0)]
+            else:
+                directions = [(drow, 0), (0, -1), (0, 1)]
+
+        result = []
+        for drow, dcol in directions:
+            point = self.jump(row, col, drow, dcol)
+            if point is not None:
+                result.append(point)
+        return result
+
+
+    def jump(self, row, col, drow, dcol):
+        """
+        Walks from (row, col) in direction (drow, dcol) and returns the first
+        jump point: the goal, a cell beside an opening that a wall hid from
+        the cell before it, or, walking vertically, a cell from which a
+        horizontal walk finds one. Returns None on reaching a wall first.
+        """
+        while True:
+            row += drow
+            col += dcol
+            if not self.is_open(row, col):
+                return None
+            if (row, col) == self.goal:
+                return (row, col)
+
+            if dcol:
+                if (self.is_open(row - 1, col) and not self.is_open(row - 1, col - dcol)) or \
+                        (self.is_open(row + 1, col) and not self.is_open(row + 1, col - dcol)):
+                    return (row, col)
+            else:
+                if (self.is_open(row, col - 1) and not self.is_open(row - drow, col - 1)) or \
+                        (self.is_open(row, col + 1) and not self.is_open(row - drow, col + 1)):
+                    return (row, col)
+                # Horizontal walks never walk vertically, so this goes one level deep at most
+                if self.jump(row, col, 0, 1) is not None or self.jump(row, col, 0, -1) is not None:
+                    return (row, col)
+
+
+    def is_open(self, row, col):
+        return 0 <= row < self.height and 0 <= col < self.width and not self.walls[row][col]
+
+
+    def interpolate(self, node):
+        """
+        Returns the (actions, cells) that lead from start to node through
+        the jump points it was reached by, filling in the cells between them.
+        """
+        points = []
+        while node is not None:
+            points.append(node.state)
+            node = node.parent
+        points.reverse()
+
+        actions = []
+        cells = []
+        for (row, col), (next_row, next_col) in zip(points, points[1:]):
+            drow = (next_row > row) - (next_row < row)
+            dcol = (next_col > col) - (next_col < col)
+            action = {(-1, 0): "up", (1, 0): "down", (0, -1): "left", (0, 1): "right"}[(drow, dcol)]
+            while (row, col) != (next_row, next_col):
+                row += drow
+                col += dcol
+                actions.append(action)
+                cells.append((row, col))
+        return (actions, cells)
+
+
+    def backtrack(self, node):
+        """Returns the (actions, cells) that lead from start to node."""
+        actions = []
+        cells = []
+        while node.parent is not None:
+            actions.append(node.action)
+            cells.append(node.state)
+            node = node.parent
+        actions.reverse()
+        cells.reverse()
+        return (actions, cells)
+
+
+    def output_image(self, filename, show_solution=True, show_explored=False, cell_size=50, cell_border=2):
+        """
+        Save a picture of the maze to filename, each cell a cell_size pixel
+        square inside a black border cell_border pixels wide.
+
+        The image is built as one array of cell colors, scaled up and
+        bordered in bulk, so large mazes render as fast as small ones draw.
+        """
+        import numpy as np
+        from PIL import Image
+
+        # Palette of cell colors, in the order later masks override earlier ones
+        EMPTY, EXPLORED, SOLUTION, GOAL, START, WALL, BORDER = range(7)
+        palette = [
+            (237, 240, 252),
+            (212, 97, 85),
+            (220, 235, 113),
+            (0, 171, 28),
+            (255, 0, 0),
+            (40, 40, 40),
+            (0, 0, 0),
+        ]
+
+        cells = np.full((self.height, self.width), EMPTY, dtype=np.uint8)
+        if self.solution is not None and show_explored:
+            rows, cols = coordinates(self.explored)
+            cells[rows, cols] = EXPLORED
+        if self.solution is not None and show_solution:
+            rows, cols = coordinates(self.solution[1])
+            cells[rows, cols] = SOLUTION
+        cells[self.goal] = GOAL
+        cells[self.start] = START
+        walls = np.frombuffer(b"".join(bytes(row) for row in self.walls), dtype=bool)
+        cells[walls.reshape(self.height, self.width)] = WALL
+
+        # Scale every cell up to a square of its color in one broadcast
+        image = np.empty((self.height, cell_size, self.width, cell_size), dtype=np.uint8)
+        image[...] = cells[:, None, :, None]
+
+        # Black out each square's border, keeping at least one pixel of color
+        border = min(cell_border, (cell_size - 1) // 2)
+        offsets = np.arange(cell_size)
+        edge = (offsets < border) | (offsets > cell_size - border)
+        image[:, edge] = BORDER
+        image[:, :, :, edge] = BORDER
+
+        # A palette image is a third the size of RGB, and much quicker to compress
+        img = Image.fromarray(image.reshape(self.height * cell_size, self.width * cell_size), "P")
+        img.putpalette([value for color in palette for value in color])
+        img.save(filename, compress_level=1)
+
+
+def coordinates(states):
+    """Returns arrays of the rows and of the columns of (row, col) states."""
+    import numpy as np
+    flat = np.fromiter(chain.from_iterable(states), dtype=np.intp, count=2 * len(states))
+    return flat[0::2], flat[1::2]
+
+
+def file_signature(filename):
+    """Returns the (mtime_ns, size) of a file, which change when it is edited."""
+    stat = os.stat(filename)
+    return (stat.st_mtime_ns, stat.st_size)
+
+
+def distances_path(filename):
+    return filename + ".distances"
+
+
+def write_distances(path, distances, height, width, signature):
+    """Write a goal distance field to path, tagged with the maze file's signature."""
+    temporary = path + ".tmp"
+    with open(temporary, "wb") as f:
+        f.write(DISTANCES_HEADER.pack(DISTANCES_MAGIC, DISTANCES_VERSION, height, width, *signature))
+        f.write(distances)
+    os.replace(temporary, path)
+
+
+def read_distances(path, height, width, signature):
+    """
+    Returns the goal distance field saved at path.
+
+    Raises ValueError if the file is not a distance field of this version
+    or was computed for another version of the maze file.
+    """
+    with open(path, "rb") as f:
+        data = f.read()
+    if len(data) < DISTANCES_HEADER.size:
+        raise ValueError("truncated distance field")
+    magic, version, stored_height, stored_width, *stored_signature = DISTANCES_HEADER.unpack_from(data)
+    if magic != DISTANCES_MAGIC or version != DISTANCES_VERSION:
+        raise ValueError("not a distance field of this version")
+    if (stored_height, stored_width) != (height, width) or tuple(stored_signature) != signature:
+        raise ValueError("distance field is out of date")
+    distances = array("i")
+    distances.frombytes(data[DISTANCES_HEADER.size:])
+    if len(distances) != height * width:
+        raise ValueError("truncated distance field")
+    return distances
+
+
+def main():
+    if len(sys.argv) not in (2, 3, 4):
+        sys.exit("Usage: python maze.py maze.txt [dfs|bfs|greedy|astar|jps|field] [manhattan|octile]")
+    algorithm = sys.argv[2] if len(sys.argv) >= 3 else "dfs"
+    heuristic = sys.argv[3] if len(sys.argv) == 4 else "manhattan"
+    if algorithm not in ALGORITHMS:
+        sys.exit(f"Unknown algorithm {algorithm}, expected one of {', '.join(ALGORITHMS)}")
+    if heuristic not in HEURISTICS:
+        sys.exit(f"Unknown heuristic {heuristic}, expected one of {', '.join(HEURISTICS)}")
+
+    m = Maze(sys.argv[1])
+    print("Maze:")
+    m.print()
+    print("Solving...")
+    m.solve(algorithm=algorithm, heuristic=heuristic)
+    print("States Explored:", m.num_explored)
+    print("Solution:")
+    m.print()
+    m.output_image("maze.png", show_explored=True)
+
+
+if __name__ == "__main__":
+    main()
\ No newline at end of file
@@ -0,0 +1,99 @@
+"""
+Tic Tac Toe bitboards
+
+A board is two 9-bit masks, one of the cells holding X and one of the
+cells holding O, where cell (i, j) is bit i * 3 + j.
+"""
+
+X = "X"
+O = "O"
+
+FULL = 0b111111111
+
+# Rows, columns and diagonals
+WIN_MASKS = (
+    0b000000111, 0b000111000, 0b111000000,
+    0b001001001, 0b010010010, 0b100100100,
+    0b100010001, 0b001010100,
+)
+
+# Whether each of the 512 masks contains a line, so checking for a win is one lookup
+WINNING = bytes(any(mask & line == line for line in WIN_MASKS) for mask in range(FULL + 1))
+
+
+def cell(i, j):
+    return i * 3 + j
+
+
+def coordinates(cell):
+    return divmod(cell, 3)
+
+
+def from_board(board):
+    """
+    Returns the (x, o) masks of a list-of-lists board.
+    """
+    x = o = 0
+    bit = 1
+    for row in board:
+        for cell in row:
+            if cell == X:
+                x |= bit
+            elif cell == O:
+                o |= bit
+            bit <<= 1
+    return x, o
+
+
+def to_board(x, o):
+    """
+    Returns the list-of-lists board of (x, o) masks.
+    """
+    return [
+        [X if x >> cell & 1 else O if o >> cell & 1 else None for cell in range(i * 3, i * 3 + 3)]
+        for i in range(3)
+    ]
+
+
+def player(x, o):
+    """
+    Returns player who has the next turn: X unless X has played more.
+    """
+    return O if x.bit_count() > o.bit_count() else X
+
+
+def actions(x, o):
+    """
+    Returns the empty cells, as bit indices.
+    """
+    free = FULL & ~(x | o)
+    return [cell for cell in range(9) if free >> cell & 1]
+
+
+def result(x, o, cell):
+    """
+    Returns the (x, o) masks after the current player takes cell.
+    """
+    if player(x, o) == X:
+        return x | 1 << cell, o
+    return x, o | 1 << cell
+
+
+def winner(x, o):
+    if WINNING[x]:
+        return X
+    if WINNING[o]:
+        return O
+    return None
+
+
+def terminal(x, o):
+    return bool(WINNING[x] or WINNING[o]) or x | o == FULL
+
+
+def utility(x, o):
+    if WINNING[x]:
+        return 1
+    if WINNING[o]:
+        return -1
+    return 0
@@ -0,0 +1,89 @@
+"""
+Tic Tac Toe opening book builder
+"""
+
+import math
+import sys
+
+import tictactoe as ttt
+from transposition import table
+
+
+def reachable_boards():
+    """
+    Returns every board reachable from the initial state by legal play.
+    """
+    boards = {}
+    stack = [ttt.initial_state()]
+    while stack:
+        board = stack.pop()
+        code = ttt.encode_board(board)
+        if code in boards:
+            continue
+        boards[code] = board
+        if not ttt.terminal(board):
+            for action in ttt.actions(board):
+                stack.append(ttt.result(board, action))
+    return boards
+
+
+def build():
+    """
+    Returns the opening book: the best move of every reachable non-terminal
+    board as i * 3 + j, at the board's encoding, by alpha-beta search.
+    """
+    # Start from an empty table, so the book does not depend on earlier searches
+    table.clear()
+    book = bytearray([ttt.NO_MOVE]) * ttt.BOOK_SIZE
+    for code, board in reachable_boards().items():
+        if not ttt.terminal(board):
+            optimal_utility, (i, j) = ttt.alpha_beta(board, -math.inf, math.inf)
+            book[code] = i * 3 + j
+    return bytes(book)
+
+
+def verify(book):
+    """
+    Returns the number of reachable boards the book has no move, an illegal
+    move or a worse move for, than a fresh search finds.
+    """
+    table.clear()
+    errors = 0
+    for code, board in reachable_boards().items():
+        move = book[code]
+        if ttt.terminal(board):
+            errors += move != ttt.NO_MOVE
+            continue
+        if move == ttt.NO_MOVE:
+            errors += 1
+            continue
+        i, j = divmod(move, 3)
+        if board[i][j] != ttt.EMPTY:
+            errors += 1
+            continue
+        optimal_utility, optimal_action = ttt.alpha_beta(board, -math.inf, math.inf)
+        move_utility, _ = ttt.alpha_beta(ttt.result(board, (i, j)), -math.inf, math.inf)
+        errors += move_utility != optimal_utility
+    return errors
+
+
+def main():
+    if len(sys.argv) > 2 or (len(sys.argv) == 2 and sys.argv[1] != "--verify"):
+        sys.exit("Usage: python book.py [--verify]")
+
+    if len(sys.argv) == 2:
+        book = ttt.load_book()
+        if book is None:
+            sys.exit(f"No opening book at {ttt.BOOK_FILE}.")
+        errors = verify(book)
+        print(f"{errors} errors in {ttt.BOOK_FILE}.")
+        sys.exit(1 if errors else 0)
+
+    book = build()
+    with open(ttt.BOOK_FILE, "wb") as f:
+        f.write(book)
+    print(f"Saved moves for {ttt.BOOK_SIZE - book.count(ttt.NO_MOVE)} boards to {ttt.BOOK_FILE}.")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,295 @@
+"""
+m,n,k games: Tic Tac Toe on a board of any size, won by k in a row
+
+Boards are bitboards like bitboard.py's, but as many bits as the board
+needs: cell (i, j) is bit i * (cols + 1) + j, leaving an empty column
+after each row, so shifting a line along never wraps onto the next row.
+"""
+
+import time
+from functools import lru_cache
+
+X = "X"
+O = "O"
+
+# Boards of more cells only search the cells next to stones
+NEAR_CELLS_ABOVE = 25
+
+
+@lru_cache(maxsize=None)
+def game(rows, cols, win_length):
+    """
+    Returns the Game of a board size and win length, built once for each.
+    """
+    return Game(rows, cols, win_length)
+
+
+class Game():
+    """
+    Rules of an m,n,k game, with the same functions as bitboard.py as
+    methods, and what the heuristic search needs: the windows of k cells
+    a line can be made in, and a score of how close each player is to one.
+    """
+
+    def __init__(self, rows, cols, win_length):
+        if rows < 1 or cols < 1:
+            raise Exception(f"Board must have at least one cell, not {rows}x{cols}")
+        if not 1 <= win_length <= max(rows, cols):
+            raise Exception(f"Win length must be between 1 and {max(rows, cols)}, not {win_length}")
+
+        self.rows = rows
+        self.cols = cols
+        self.win_length = win_length
+        # Bits per row, including the empty column
+        self.width = cols + 1
+        self.cells = [self.cell(i, j) for i in range(rows) for j in range(cols)]
+        self.full = sum(1 << cell for cell in self.cells)
+
+        # Every window of win_length cells in a row, column or diagonal
+        self.windows = []
+        for di, dj in ((0, 1), (1, 0), (1, 1), (1, -1)):
+            for i in range(rows):
+                for j in range(cols):
+                    end_i, end_j = i + di * (win_length - 1), j + dj * (win_length - 1)
+                    if 0 <= end_i < rows and 0 <= end_j < cols:
+                        self.windows.append(sum(
+                            1 << self.cell(i + di * step, j + dj * step) for step in range(win_length)
+                        ))
+        self.windows_through = [[] for bit in range(rows * self.width)]
+        for window in self.windows:
+            for cell in self.cells:
+                if window >> cell & 1:
+                    self.windows_through[cell].append(window)
+
+        # Worth of a window holding count stones of one player and none of the other
+        self.weights = [0] + [10 ** count for count in range(1, win_length + 1)]
+        # More than any sum of window weights short of a line
+        self.win_score = 4 * rows * cols * 10 ** win_length
+
+        # Cells nearest the center first, so search tries them first
+        center_i, center_j = (rows - 1) / 2, (cols - 1) / 2
+        self.order = sorted(self.cells, key=lambda cell: abs(cell // self.width - center_i) + abs(cell % self.width - center_j))
+
+    def cell(self, i, j):
+        return i * self.width + j
+
+    def coordinates(self, cell):
+        return divmod(cell, self.width)
+
+    def from_board(self, board):
+        """
+        Returns the (x, o) masks of a list-of-lists board.
+        """
+        x = o = 0
+        for i, row in enumerate(board):
+            for j, value in enumerate(row):
+                if value == X:
+                    x |= 1 << self.cell(i, j)
+                elif value == O:
+                    o |= 1 << self.cell(i, j)
+        return x, o
+
+    def to_board(self, x, o):
+        """
+        Returns the list-of-lists board of (x, o) masks.
+        """
+        board = []
+        for i in range(self.rows):
+            row = []
+            for j in range(self.cols):
+                cell = self.cell(i, j)
+                row.append(X if x >> cell & 1 else O if o >> cell & 1 else None)
+            board.append(row)
+        return board
+
+    def player(self, x, o):
+        return O if x.bit_count() > o.bit_count() else X
+
+    def actions(self, x, o):
+        """
+        Returns the empty cells, as bit indices.
+        """
+        free = self.full & ~(x | o)
+        return [cell for cell in self.cells if free >> cell & 1]
+
+    def result(self, x, o, cell):
+        if self.player(x, o) == X:
+            return x | 1 << cell, o
+        return x, o | 1 << cell
+
+    def wins(self, mask):
+        """
+        Returns whether mask holds win_length cells in a line.
+        """
+        for step in (1, self.width, self.width + 1, self.width - 1):
+            # Keep each bit that starts a run of ever more cells, one step apart
+            run = mask
+            for count in range(self.win_length - 1):
+                run &= run >> step
+            if run:
+                return True
+        return False
+
+    def winner(self, x, o):
+        if self.wins(x):
+            return X
+        if self.wins(o):
+            return O
+        return None
+
+    def terminal(self, x, o):
+        return self.wins(x) or self.wins(o) or x | o == self.full
+
+    def utility(self, x, o):
+        if self.wins(x):
+            return 1
+        if self.wins(o):
+            return -1
+        return 0
+
+    def evaluate(self, own, other):
+        """
+        Returns the heuristic score of a board for the player with the own
+        mask: the weights of the windows only they have stones in, less
+        those of the windows only the other player has stones in.
+        """
+        score = 0
+        for window in self.windows:
+            if not own & window:
+                score -= self.weights[(other & window).bit_count()]
+            elif not other & window:
+                score += self.weights[(own & window).bit_count()]
+        return score
+
+    def play(self, own, other, cell):
+        """
+        Returns (change, won) for the player with the own mask taking cell:
+        how much their heuristic score changes, and whether it wins.
+        Only the windows through cell change, so only those are counted.
+        """
+        change = 0
+        won = False
+        for window in self.windows_through[cell]:
+            theirs = (other & window).bit_count()
+            if theirs:
+                # Blocks the other player's window, unless it already was
+                if not own & window:
+                    change += self.weights[theirs]
+                continue
+            count = (own & window).bit_count()
+            change += self.weights[count + 1] - self.weights[count]
+            if count + 1 == self.win_length:
+                won = True
+        return change, won
+
+    def candidates(self, occupied):
+        """
+        Returns the empty cells worth searching, nearest the center first:
+        on boards of more than NEAR_CELLS_ABOVE cells, those next to an
+        occupied cell, or the center cell if the board is empty.
+        """
+        if len(self.cells) <= NEAR_CELLS_ABOVE:
+            return [cell for cell in self.order if not occupied >> cell & 1]
+        if not occupied:
+            return self.order[:1]
+        # Spread the occupied cells one cell in every direction (the empty column stops rows wrapping)
+        near = occupied | occupied << 1 | occupied >> 1
+        near |= near << self.width | near >> self.width
+        near &= self.full & ~occupied
+        return [cell for cell in self.order if near >> cell & 1]
+
+
+class Timeout(Exception):
+    pass
+
+
+class Search():
+    """
+    Iterative-deepening alpha-beta search with a wall-clock budget.
+
+    Each pass searches one move deeper than the last, scoring the boards
+    where it stops with Game.evaluate, and the best move of the last pass
+    to finish is played. The best moves of a pass are tried first in the
+    next, so the deeper passes cut off sooner. On large boards only cells
+    next to stones are searched (see Game.candidates), which keeps them
+    down to a few dozen moves each.
+    """
+
+    def __init__(self, game, budget):
+        self.game = game
+        self.budget = budget
+        self.deadline = None
+        self.nodes = 0
+        self.depth_reached = 0
+        # Whether the pass stopped at any board that was not over
+        self.cut_off = False
+        self.best_cells = {}
+
+    def best_move(self, x, o):
+        """
+        Returns the cell the current player should take, searching deeper
+        until budget seconds run out or the game is solved. The first pass
+        always runs to the end, so there is always a move.
+        """
+        game = self.game
+        start = time.perf_counter()
+        own, other = (x, o) if game.player(x, o) == X else (o, x)
+        score = game.evaluate(own, other)
+        best_cell = None
+
+        for depth in range(1, len(game.actions(x, o)) + 1):
+            self.deadline = None if depth == 1 else start + self.budget
+            self.cut_off = False
+            try:
+                value, cell = self.negamax(own, other, score, depth, -game.win_score * 2, game.win_score * 2)
+            except Timeout:
+                break
+            best_cell = cell
+            self.depth_reached = depth
+            # Nothing more to learn once the search sees the end of every line of play
+            if not self.cut_off or abs(value) >= game.win_score:
+                break
+        return best_cell
+
+    def negamax(self, own, other, score, depth, alpha, beta):
+        """
+        Returns (value, cell) for the player with the own mask, where score
+        is their heuristic score and value is within (alpha, beta) if exact.
+        Wins score win_score plus the depth left, so sooner wins score higher.
+        """
+        self.nodes += 1
+        if self.deadline is not None and self.nodes & 255 == 0 and time.perf_counter() > self.deadline:
+            raise Timeout
+
+        game = self.game
+        occupied = own | other
+        cells = game.candidates(occupied)
+        if not cells:
+            return 0, None
+        if depth == 0:
+            self.cut_off = True
+            return score, None
+
+        key = (own, other)
+        best_cell = self.best_cells.get(key)
+        if best_cell is not None:
+            cells.remove(best_cell)
+            cells.insert(0, best_cell)
+
+        best_value = None
+        for cell in cells:
+            change, won = game.play(own, other, cell)
+            if won:
+                value = game.win_score + depth
+            else:
+                value, _ = self.negamax(other, own | 1 << cell, -(score + change), depth - 1, -beta, -alpha)
+                value = -value
+            if best_value is None or value > best_value:
+                best_value, best_cell = value, cell
+                if value > alpha:
+                    alpha = value
+            if alpha >= beta:
+                break
+
+        self.best_cells[key] = best_cell
+        return best_value, best_cell
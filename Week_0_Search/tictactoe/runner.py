@@ -4,8 +4,16 @@ import time
 
 import tictactoe as ttt
 
+if len(sys.argv) not in (1, 4):
+    sys.exit("Usage: python runner.py [rows cols win_length]")
+if len(sys.argv) == 4:
+    ttt.configure(int(sys.argv[1]), int(sys.argv[2]), int(sys.argv[3]))
+rows, cols = ttt.ROWS, ttt.COLS
+
 pygame.init()
-size = width, height = 600, 400
+# Tiles shrink to fit larger boards, and the window grows to fit the rows
+tile_size = min(80, 480 // max(rows, cols))
+size = width, height = 600, max(400, rows * tile_size + 150)
 
 # Colors
 black = (0, 0, 0)
@@ -15,7 +23,7 @@ screen = pygame.display.set_mode(size)
 
 mediumFont = pygame.font.Font("OpenSans-Regular.ttf", 28)
 largeFont = pygame.font.Font("OpenSans-Regular.ttf", 40)
-moveFont = pygame.font.Font("OpenSans-Regular.ttf", 60)
+moveFont = pygame.font.Font("OpenSans-Regular.ttf", tile_size * 3 // 4)
 
 user = None
 board = ttt.initial_state()
@@ -33,7 +41,11 @@ while True:
     if user is None:
 
         # Draw title
-        title = largeFont.render("Play Tic-Tac-Toe", True, white)
+        if (rows, cols, ttt.WIN_LENGTH) == (3, 3, 3):
+            title = "Play Tic-Tac-Toe"
+        else:
+            title = f"Play {rows}x{cols}, {ttt.WIN_LENGTH} in a row"
+        title = largeFont.render(title, True, white)
         titleRect = title.get_rect()
         titleRect.center = ((width / 2), 50)
         screen.blit(title, titleRect)
@@ -67,13 +79,12 @@ while True:
     else:
 
         # Draw game board
-        tile_size = 80
-        tile_origin = (width / 2 - (1.5 * tile_size),
-                       height / 2 - (1.5 * tile_size))
+        tile_origin = (width / 2 - (cols / 2 * tile_size),
+                       height / 2 - (rows / 2 * tile_size))
         tiles = []
-        for i in range(3):
+        for i in range(rows):
             row = []
-            for j in range(3):
+            for j in range(cols):
                 rect = pygame.Rect(
                     tile_origin[0] + j * tile_size,
                     tile_origin[1] + i * tile_size,
@@ -122,8 +133,8 @@ while True:
         click, _, _ = pygame.mouse.get_pressed()
         if click == 1 and user == player and not game_over:
             mouse = pygame.mouse.get_pos()
-            for i in range(3):
-                for j in range(3):
+            for i in range(rows):
+                for j in range(cols):
                     if (board[i][j] == ttt.EMPTY and tiles[i][j].collidepoint(mouse)):
                         board = ttt.result(board, (i, j))
 
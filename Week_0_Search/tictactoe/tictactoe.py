@@ -3,57 +3,84 @@ Tic Tac Toe Player
 """
 
 import math
-import copy
+import os
+
+import bitboard
+import mnk
+from bitboard import FULL, WINNING
+from transposition import DIGITS, EXACT, LOWER, UPPER, table
 
 X = "X"
 O = "O"
 EMPTY = None
+
+# Size of the board and how many in a row win, set with configure.
+# Other sizes are played with mnk.py, without the opening book or transposition table
+ROWS = 3
+COLS = 3
+WIN_LENGTH = 3
+
+# Seconds the computer may think about each move on boards other than 3x3
+TIME_BUDGET = 1.0
+
+# Order in which alpha-beta tries moves, as bitboard cells: center,
+# corners, then edges. Strong moves first make cutoffs come sooner
+MOVE_ORDER = (4, 0, 2, 6, 8, 1, 3, 5, 7)
+
+# The empty cells of each occupied mask, in MOVE_ORDER
+FREE_CELLS = [[cell for cell in MOVE_ORDER if not occupied >> cell & 1] for occupied in range(FULL + 1)]
+
+# Opening book written by book.py: the best move (i * 3 + j) for every board,
+# indexed by its base-3 encoding, NO_MOVE for terminal and unreachable boards
+BOOK_FILE = os.path.join(os.path.dirname(os.path.abspath(__file__)), "opening_book.bin")
+BOOK_SIZE = 3 ** 9
+NO_MOVE = 255
       
 
+def configure(rows=3, cols=3, win_length=3):
+    """
+    Sets the size of the board initial_state returns, and the number
+    of marks in a row that win the game.
+    """
+    global ROWS, COLS, WIN_LENGTH
+    # Raises if the size or win length make no game
+    mnk.game(rows, cols, win_length)
+    ROWS, COLS, WIN_LENGTH = rows, cols, win_length
+
+
 def initial_state():
     """
     Returns starting state of the board.
     """
-    return [[EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY],
-            [EMPTY, EMPTY, EMPTY]]
+    return [[EMPTY] * COLS for i in range(ROWS)]
+
+
+def game_core(board):
+    """
+    Returns the game core for a board: the bitboard module for 3x3 boards
+    won by three in a row, otherwise the mnk.Game of its size. Both have
+    the same functions, on (x, o) masks.
+    """
+    rows, cols = len(board), len(board[0])
+    if (rows, cols, WIN_LENGTH) == (3, 3, 3):
+        return bitboard
+    return mnk.game(rows, cols, WIN_LENGTH)
 
 
 def player(board):
     """
     Returns player who has the next turn on a board.
     """
-    # Count number of X and number of O
-    count_X = 0
-    count_O = 0
-    for row in board:
-        for cell in row:
-            if cell == "X":
-                count_X += 1
-            elif cell == "O":
-                count_O += 1
-            else:
-                continue
-    
-    # If number of X > number of O => return O
-    if count_X > count_O:
-        return "O"
-    else: # If number of X == number of O => return X
-        return "X"
+    core = game_core(board)
+    return core.player(*core.from_board(board))
     
 
 def actions(board):
     """
     Returns set of all possible actions (i, j) available on the board.
     """
-    action_set = set()
-    for row_idx in range(len(board)):
-        for col_idx in range(len(board[row_idx])):
-            if (board[row_idx][col_idx] is None):
-                action = (row_idx, col_idx)
-                action_set.add(action)
-                
-    return action_set
+    core = game_core(board)
+    return {core.coordinates(cell) for cell in core.actions(*core.from_board(board))}
 
 
 def result(board, action):
@@ -64,67 +91,32 @@ def result(board, action):
     COL = 1
     
     # Check if the action is valid on the board
-    if board[action[ROW]][action[COL]] != EMPTY: # Is cell occupied?
-        raise Exception(f"This action is illegal: cell ({action[ROW]},{action[COL]}) has been occupied")
-    
-    if (action[ROW] < 0) or (action[ROW] > 2) or (action[COL] < 0) or (action[COL] > 2): # Is the cell in action inside the board?
+    if (action[ROW] < 0) or (action[ROW] >= len(board)) or (action[COL] < 0) or (action[COL] >= len(board[0])): # Is the cell in action inside the board?
         raise Exception(f"This action is illegal: cell ({action[ROW]},{action[COL]}) is outside the board")
     
-    # Decide which player is going to play based on the current board state
-    player_sign = player(board)
-    
-    # Create a deep copy of the old board
-    result_board = copy.deepcopy(board)
-    
-    # Update the cell state on the result board based on the action and the player
-    result_board[action[ROW]][action[COL]] = player_sign
+    if board[action[ROW]][action[COL]] != EMPTY: # Is cell occupied?
+        raise Exception(f"This action is illegal: cell ({action[ROW]},{action[COL]}) has been occupied")
     
-    # Return result board  
-    return result_board
+    # Play the move on the bitboard and build a new board from it, leaving the old one as it was
+    core = game_core(board)
+    x, o = core.result(*core.from_board(board), core.cell(action[ROW], action[COL]))
+    return core.to_board(x, o)
 
 
 def winner(board): # or None
     """
     Returns the winner of the game, if there is one.
     """
-    # Conditions for X to win, return "X"
-    if     ((board[0][0]=="X") and (board[0][1]=="X") and (board[0][2]=="X")) \
-        or ((board[1][0]=="X") and (board[1][1]=="X") and (board[1][2]=="X")) \
-        or ((board[2][0]=="X") and (board[2][1]=="X") and (board[2][2]=="X")) \
-        or ((board[0][0]=="X") and (board[1][0]=="X") and (board[2][0]=="X")) \
-        or ((board[0][1]=="X") and (board[1][1]=="X") and (board[2][1]=="X")) \
-        or ((board[0][2]=="X") and (board[1][2]=="X") and (board[2][2]=="X")) \
-        or ((board[0][0]=="X") and (board[1][1]=="X") and (board[2][2]=="X")) \
-        or ((board[0][2]=="X") and (board[1][1]=="X") and (board[2][0]=="X")):
-        return "X"
-    
-    # Conditions for O to win, return "O"
-    elif   ((board[0][0]=="O") and (board[0][1]=="O") and (board[0][2]=="O")) \
-        or ((board[1][0]=="O") and (board[1][1]=="O") and (board[1][2]=="O")) \
-        or ((board[2][0]=="O") and (board[2][1]=="O") and (board[2][2]=="O")) \
-        or ((board[0][0]=="O") and (board[1][0]=="O") and (board[2][0]=="O")) \
-        or ((board[0][1]=="O") and (board[1][1]=="O") and (board[2][1]=="O")) \
-        or ((board[0][2]=="O") and (board[1][2]=="O") and (board[2][2]=="O")) \
-        or ((board[0][0]=="O") and (board[1][1]=="O") and (board[2][2]=="O")) \
-        or ((board[0][2]=="O") and (board[1][1]=="O") and (board[2][0]=="O")):
-        return "O"
-    else: #If there is a tie, or the game state is not terminal, return None
-        return None
+    core = game_core(board)
+    return core.winner(*core.from_board(board))
     
     
 def terminal(board):
     """
     Returns True if game is over, False otherwise.
     """
-    # If some one has won the game, return true
-    if winner(board) != None: 
-        return True
-    # If no one won, but all cells has been filled , return true
-    elif len(actions(board)) == 0:
-        return True
-    # Else, the game is still in progress, return false
-    else: 
-        return False
+    core = game_core(board)
+    return core.terminal(*core.from_board(board))
     
 
 def utility(board) :
@@ -132,103 +124,146 @@ def utility(board) :
     Returns 1 if X has won the game, -1 if O has won, 0 otherwise.
     """
     # Assume that utility function will only be called on a board if terminal(board) is True.
-    # if terminal(board) == True: #assume that the board is in terminal state
-    the_winner = winner(board)
-    if the_winner == "X":
-        return 1
-    elif the_winner == "O":
-        return -1
-    else: #If the game ended in a tie
-        return 0
-    # else: 
-    #     raise Exception("This function should only be called on terminal board state!")
+    core = game_core(board)
+    return core.utility(*core.from_board(board))
     
 
-def minimax(board):
+def minimax(board, budget=None):
     """
     Returns the optimal action for the current player on the board.
+
+    Boards other than 3x3 are too big to search to the end, so for those it
+    returns the best action found by iterative deepening in budget seconds
+    (TIME_BUDGET by default).
     """
     # if the board is at terminal state, the minimax function will return None
     if terminal(board):
         return None
+
+    core = game_core(board)
+    if core is not bitboard:
+        search = mnk.Search(core, TIME_BUDGET if budget is None else budget)
+        return core.coordinates(search.best_move(*core.from_board(board)))
     
-    # traverse the board to find the optimal action 
-    optimal_action, optimal_utility = optimize_action(board=board, depth=0)      
+    # look the action up in the opening book, if there is one
+    if book is not None:
+        move = book[encode_board(board)]
+        if move != NO_MOVE:
+            return divmod(move, 3)
+
+    # search the game tree with alpha-beta pruning to find the optimal action
+    optimal_utility, optimal_action = alpha_beta(board, alpha=-math.inf, beta=math.inf)
     return optimal_action
 
 
-def optimize_action(board, depth):
-    # # travel through the sub-board in a recursive manner
-    # print("\t"*depth,board)
-    utility_value = None
-    optimal_action = None    
-    
-    #check if the board is at terminal state
-    if not terminal(board):
-        # posible actions:
-        action_list = list(actions(board))
-        
-        # compute result board of each actions:           
-        result_boards = [result(board, an_action) for an_action in list(action_list)]
-        
-        # recursively call minimax on each result board            
-        utility_list = [optimize_action(a_result_board, depth=depth+1) for a_result_board in result_boards]
-            
-        # choose an optimal utility value and optimal action from nodes
-        if player(board) == "X": # if "X" is the player, choose the action with max score
-            optimal_action, utility_value = maximize_option(action_list, utility_list)
-        else: # if "O" is the player, choose the action with min score
-            optimal_action, utility_value = minimize_option(action_list, utility_list)
-    
-        ## Print function for debugging
-        # if depth == 0:
-        #     print(board)
-        #     print("Player", player(board))
-        #     print(action_list, sep="\t")
-        #     print(utility_list, sep="\t")
-        #     print(optimal_action, utility_value)
-            
-    else: # at terminal state
-        # compute utility function
-        utility_value = utility(board)
-        optimal_action = None
-    
-    ## travel through the sub-board in a recursive manner and print the result (for debugging purposes)
-    # depth_space = "\t"*depth
-    # print(f"{depth_space} {board}, utility: {utility_value}, player: {player(board)}, optimal action: {optimal_action}, depth: {depth}")
-    
-    # Return optimal_action and optimal utility_value at first board
-    if depth == 0:
-        return optimal_action, utility_value
-    else: # For other board, only return utility_value
-        return utility_value
-    
+def encode_board(board):
+    """
+    Returns the base-3 number of a board, with one digit per cell.
+    """
+    code = 0
+    for row in board:
+        for cell in row:
+            code = code * 3 + DIGITS[cell]
+    return code
+
+
+def load_book(path=BOOK_FILE):
+    """
+    Returns the opening book saved at path, or None if there is none.
+    """
+    try:
+        with open(path, "rb") as f:
+            data = f.read()
+    except OSError:
+        return None
+    if len(data) != BOOK_SIZE:
+        return None
+    return data
+
 
-def maximize_option(action_list, utility_list):
+# Loaded once on import, so minimax never searches if the book is there
+book = load_book()
+
+
+def alpha_beta(board, alpha, beta):
     """
-    Returns the maximum utility score with the respective action
+    Returns (utility, action) for the current player on the board,
+    where utility is exact if it lies strictly between alpha and beta,
+    otherwise a bound beyond them. action is None at terminal states.
     """
-    max_utility = -2
-    max_action = None
-    for i in range(len(utility_list)):     
-        if utility_list[i] > max_utility:
-            max_utility = utility_list[i]
-            max_action = action_list[i]
-    return max_action, max_utility
-            
+    optimal_utility, cell = search(*bitboard.from_board(board), alpha, beta)
+    return optimal_utility, None if cell is None else divmod(cell, 3)
+
 
-def minimize_option(action_list, utility_list):
+def search(x, o, alpha, beta):
     """
-    Returns the minimum utility score with the respective action
+    Alpha-beta search on the bitboard (x, o), returning (utility, cell)
+    as alpha_beta does, with cell a bitboard cell.
+
+    Branches that cannot change the decision are skipped, and a player
+    stops searching as soon as it finds a winning move. Results are kept
+    in the shared transposition table, so positions seen before, or
+    rotations and reflections of them, are not searched again.
     """
-    min_utility = +2
-    min_action = None
-    for i in range(len(utility_list)):        
-        if utility_list[i] < min_utility:
-            min_utility = utility_list[i]
-            min_action = action_list[i]
-    return min_action, min_utility
-           
+    # Terminal states, as bitboard.terminal and bitboard.utility but without the calls
+    if WINNING[x]:
+        return 1, None
+    if WINNING[o]:
+        return -1, None
+    occupied = x | o
+    if occupied == FULL:
+        return 0, None
+
+    # A stored exact utility answers outright, a stored bound if it falls outside the window
+    entry = table.lookup_masks(x, o)
+    stored_cell = None
+    if entry is not None:
+        stored_utility, flag, stored_cell = entry
+        if flag == EXACT or (flag == LOWER and stored_utility >= beta) or (flag == UPPER and stored_utility <= alpha):
+            return stored_utility, stored_cell
+
+    maximizing = x.bit_count() == o.bit_count()
+    # Best outcome each player can hope for: a win
+    best_possible = 1 if maximizing else -1
+    original_alpha, original_beta = alpha, beta
+    optimal_utility = -math.inf if maximizing else math.inf
+    optimal_cell = None
+
+    # Try the best move found by an earlier search first
+    cells = FREE_CELLS[occupied]
+    if stored_cell is not None:
+        cells = cells.copy()
+        cells.remove(stored_cell)
+        cells.insert(0, stored_cell)
+    for cell in cells:
+        if maximizing:
+            value, _ = search(x | 1 << cell, o, alpha, beta)
+            if value > optimal_utility:
+                optimal_utility, optimal_cell = value, cell
+                if value > alpha:
+                    alpha = value
+        else:
+            value, _ = search(x, o | 1 << cell, alpha, beta)
+            if value < optimal_utility:
+                optimal_utility, optimal_cell = value, cell
+                if value < beta:
+                    beta = value
+
+        # Nothing beats a win, and the opponent will not allow anything outside the window
+        if optimal_utility == best_possible or alpha >= beta:
+            break
+
+    if optimal_utility == best_possible:
+        flag = EXACT
+    elif optimal_utility <= original_alpha:
+        flag = UPPER
+    elif optimal_utility >= original_beta:
+        flag = LOWER
+    else:
+        flag = EXACT
+    table.store_masks(x, o, optimal_utility, flag, optimal_cell)
+    return optimal_utility, optimal_cell
+
 
 # if __name__ == "__main__":
 #     trial_board = [["X", "O", "O"],
@@ -242,5 +277,5 @@ def minimize_option(action_list, utility_list):
 # potential problems: unallowed modification 06/04/2023
 # 1. if__name__ == "main__": Done (commented it out)
 # 2. raise ValueError: change to raise Exception, comment out the exception in utility: Done
-# 3. copy.deepcopy: not a problem, other uses this package
+# 3. copy.deepcopy: no longer used, result builds a new board from the bitboards
 # 4. change the return type of actions(board) from list[tuple] to set[tuple]
\ No newline at end of file
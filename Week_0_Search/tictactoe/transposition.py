@@ -0,0 +1,127 @@
+"""
+Transposition table for Tic Tac Toe search
+"""
+
+from collections import OrderedDict
+from functools import lru_cache
+
+import bitboard
+
+# Kinds of stored utility: exact, or only a bound from a search cut short
+EXACT = 0
+LOWER = 1
+UPPER = 2
+
+# Digit of each cell value in a board's base-3 encoding
+DIGITS = {None: 0, bitboard.X: 1, bitboard.O: 2}
+
+
+def symmetries():
+    """
+    Returns the 8 rotations and reflections of the board, each as a tuple
+    giving, for each flat cell (i * 3 + j) of the transformed board,
+    the flat cell of the original board it comes from.
+    """
+    transforms = []
+    for reflect in (False, True):
+        for turns in range(4):
+            cells = []
+            for i in range(3):
+                for j in range(3):
+                    row, col = (j, i) if reflect else (i, j)
+                    for turn in range(turns):
+                        row, col = col, 2 - row
+                    cells.append(row * 3 + col)
+            transforms.append(tuple(cells))
+    return transforms
+
+
+SYMMETRIES = symmetries()
+
+# Each symmetry applied to each of the 512 masks, so transforming a mask is one lookup
+TRANSFORMED = [
+    [sum(1 << i for i, cell in enumerate(symmetry) if mask >> cell & 1) for mask in range(bitboard.FULL + 1)]
+    for symmetry in SYMMETRIES
+]
+
+
+# Few enough boards are legal (3 ** 9 at most) to remember every one
+@lru_cache(maxsize=None)
+def canonical(x, o):
+    """
+    Returns (key, symmetry) for a board's (x, o) masks: key is the smallest
+    encoding of the board over its 8 symmetries, the same for every board
+    the symmetries turn into each other, and symmetry is the one giving it.
+    """
+    best_key, best_symmetry = None, None
+    for symmetry, transformed in zip(SYMMETRIES, TRANSFORMED):
+        key = transformed[x] << 9 | transformed[o]
+        if best_key is None or key < best_key:
+            best_key, best_symmetry = key, symmetry
+    return best_key, best_symmetry
+
+
+class TranspositionTable():
+    """
+    Least-recently-used cache of search results by canonical board, so a
+    position reached through other move orders or as a rotation or
+    reflection of a solved one is not searched again. Holds at most
+    max_entries boards.
+    """
+
+    def __init__(self, max_entries=100_000):
+        self.max_entries = max_entries
+        self.entries = OrderedDict()
+
+    def lookup(self, board):
+        """
+        Returns (utility, flag, action) stored for a list-of-lists board,
+        with action mapped back onto board, or None if board has no entry.
+        flag is EXACT, LOWER or UPPER.
+        """
+        entry = self.lookup_masks(*bitboard.from_board(board))
+        if entry is None:
+            return None
+        utility, flag, cell = entry
+        return utility, flag, None if cell is None else divmod(cell, 3)
+
+    def store(self, board, utility, flag, action):
+        """
+        Remember utility (with its flag) and the best action found for a list-of-lists board.
+        """
+        cell = None if action is None else action[0] * 3 + action[1]
+        self.store_masks(*bitboard.from_board(board), utility, flag, cell)
+
+    def lookup_masks(self, x, o):
+        """
+        Returns (utility, flag, cell) stored for the board of (x, o) masks,
+        as lookup does, with cell a bit index.
+        """
+        key, symmetry = canonical(x, o)
+        entry = self.entries.get(key)
+        if entry is None:
+            return None
+        self.entries.move_to_end(key)
+        utility, flag, cell = entry
+        return utility, flag, None if cell is None else symmetry[cell]
+
+    def store_masks(self, x, o, utility, flag, cell):
+        """
+        Remember utility (with its flag) and the best cell found for the board of (x, o) masks.
+        """
+        key, symmetry = canonical(x, o)
+        # Stored in canonical coordinates: the canonical cell taken from the board's cell
+        self.entries[key] = (utility, flag, None if cell is None else symmetry.index(cell))
+        self.entries.move_to_end(key)
+        while len(self.entries) > self.max_entries:
+            self.entries.popitem(last=False)
+
+    def clear(self):
+        self.entries.clear()
+
+    def __len__(self):
+        return len(self.entries)
+
+
+# Shared by tictactoe.minimax and tictactoe_utils.minimax
+table = TranspositionTable()
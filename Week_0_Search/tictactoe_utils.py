@@ -1,4 +1,5 @@
 from tictactoe import initial_state, player, actions, result, winner, terminal, utility
+from transposition import EXACT, table
 
 X = "X"
 O = "O"
@@ -11,10 +12,21 @@ def minimax(board) -> tuple[int, int]:
     """
     Returns the optimal action for the current player on the board.
     """
+    # Boards already solved here or by tictactoe.minimax, up to symmetry, need no tree
+    entry = table.lookup(board)
+    if entry is not None and entry[1] == EXACT:
+        return entry[2]
+
     game_tree = BoardTree(board)
     game_tree.build_tree()
     game_tree.backtrack_tree()
     # game_tree.traverse_tree()
+
+    # Remember the root and the next two layers: the next call will be two moves on
+    for current_layer in game_tree.nodes_in_layers[:3]:
+        for current_node in current_layer:
+            if not terminal(current_node.board_state):
+                table.store(current_node.board_state, current_node.utility_of_choice, EXACT, current_node.action_of_choice)
     return game_tree.root_node.action_of_choice
 
 class BoardTree(object):
@@ -97,10 +109,10 @@ class BoardTree(object):
                     current_node.update_utility_of_choice(utility_of_choice) 
                     current_node.update_action_of_choice(action_of_choice)
                     
-                    # Propagate this node's chosen utility and chosen action to parent node (the root node can not perform this operation)
+                    # Propagate this node's chosen utility, and the action that led to it, to parent node (the root node can not perform this operation)
                     if current_node.parent_node is not None:
                         current_node.parent_node.children_utility.append(current_node.utility_of_choice)
-                        current_node.parent_node.children_action.append(current_node.action_of_choice)
+                        current_node.parent_node.children_action.append(current_node.taken_action)
 
                 
         # self.traverse_tree()